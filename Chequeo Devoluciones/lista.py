@@ -11,36 +11,72 @@ import argparse
 import hashlib
 import subprocess
 import logging
-from datetime import datetime, timedelta
+import threading
+import queue
+import functools
+import shutil
+import mmap
+import csv
+import itertools
+import contextlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, date
 from dateutil.parser import parse as parse_date
-import pytesseract
-from pdf2image import convert_from_path
-from PyPDF2 import PdfReader
-import pandas as pd
 import numpy as np
-import cv2
 from PIL import Image
 import tempfile
 import io
 import unicodedata
 
-# Excel templating
-from openpyxl import load_workbook
+# pytesseract, pandas, openpyxl, pdf2image, OpenCV y streamlit se importan dentro de las funciones que los usan:
+# el arranque del CLI (p. ej. --help) no paga su carga, que suma cientos de ms.
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import pandas as pd
 
-# Streamlit import is optional for CLI mode
-try:
-    import streamlit as st
-    STREAMLIT_AVAILABLE = True
-except Exception:
-    STREAMLIT_AVAILABLE = False
+# Streamlit import is optional for CLI mode (solo se comprueba que esté instalado)
+STREAMLIT_AVAILABLE = importlib.util.find_spec("streamlit") is not None
+
+# Motor para el informe de auditoría (hojas solo de datos): XlsxWriter escribe más rápido y con menos
+# memoria que openpyxl; openpyxl queda como respaldo y para rellenar la plantilla con estilos.
+EXCEL_ENGINE_INFORME = "xlsxwriter" if importlib.util.find_spec("xlsxwriter") is not None else "openpyxl"
+
+# PyMuPDF (opcional): rasteriza las páginas dentro del proceso, sin lanzar pdftoppm; si no está, se usa poppler
+HAVE_PYMUPDF = importlib.util.find_spec("pymupdf") is not None
 
 # optional fuzzy lib — use if installed
 try:
-    from rapidfuzz import fuzz
+    from rapidfuzz import fuzz, process
     HAVE_RAPIDFUZZ = True
 except Exception:
     HAVE_RAPIDFUZZ = False
 
+# optional Aho-Corasick (pyahocorasick) — búsqueda de muchas keywords en una sola pasada
+try:
+    import ahocorasick
+    HAVE_AHOCORASICK = True
+except Exception:
+    HAVE_AHOCORASICK = False
+
+# OpenCV (opcional): preprocesado de páginas antes del OCR; se carga en el primer uso
+@functools.lru_cache(maxsize=1)
+def _cargar_cv2():
+    try:
+        import cv2
+        return cv2
+    except Exception:
+        return None
+
+# tesserocr (opcional): API de Tesseract en proceso, evita lanzar un subproceso por página.
+# OMP_THREAD_LIMIT debe fijarse antes de cargar el motor.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+try:
+    from tesserocr import PyTessBaseAPI, PSM
+    HAVE_TESSEROCR = True
+except Exception:
+    HAVE_TESSEROCR = False
+
 # ---------------- logging ----------------
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
@@ -55,10 +91,29 @@ TEMPLATE_NO_MISIONAL = "lista2.xlsx"  # plantilla base no_misional (usuario pued
 
 # Aplicar configuración de pytesseract y TESSDATA_PREFIX
 os.environ.setdefault("TESSDATA_PREFIX", TESSDATA_DIR)
-pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
-
-# Verificar que tesseract y spa estén disponibles (advertencia si faltas)
+_tesseract_cmd = TESSERACT_CMD  # ejecutable activo (CLI/UI pueden cambiarlo con configurar_tesseract)
+
+def configurar_tesseract(cmd):
+    """Fija el ejecutable de Tesseract para pytesseract y para el OCR por lotes."""
+    global _tesseract_cmd
+    _tesseract_cmd = cmd
+    if "pytesseract" in sys.modules:
+        sys.modules["pytesseract"].pytesseract.tesseract_cmd = cmd
+
+@functools.lru_cache(maxsize=1)
+def _cargar_pytesseract():
+    # pytesseract importa pandas al cargarse: se difiere hasta el primer OCR que lo necesite
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = _tesseract_cmd
+    return pytesseract
+
+# Verificar que tesseract y spa estén disponibles (advertencia si faltas).
+# Se invoca desde los puntos de entrada (no al importar) y el resultado queda en caché.
+@functools.lru_cache(maxsize=1)
 def verificar_tesseract_y_idioma(idioma_req="spa"):
+    if not shutil.which(TESSERACT_CMD):
+        logging.warning(f"No se encontró el ejecutable de Tesseract en {TESSERACT_CMD}")
+        return False
     try:
         proc = subprocess.run([TESSERACT_CMD, "--list-langs"], capture_output=True, text=True, check=True)
         out_lines = [ln.strip() for ln in proc.stdout.splitlines() if ln.strip()]
@@ -72,41 +127,160 @@ def verificar_tesseract_y_idioma(idioma_req="spa"):
         if idioma_req.lower() not in installed:
             logging.warning(f"Idioma requerido '{idioma_req}' no encontrado en tessdata (detectados: {installed}). "
                             f"Considera instalar '{idioma_req}.traineddata' en {TESSDATA_DIR}.")
+            return False
+        return True
     except subprocess.CalledProcessError as e:
         logging.warning(f"Error al invocar Tesseract para listar idiomas: {e.stderr or e.stdout}")
     except Exception as e:
         logging.warning(f"No se pudo verificar Tesseract/tessdata: {e}")
-
-verificar_tesseract_y_idioma("spa")
+    return False
 
 # ---------------- festivos y utilidades ----------------
-COLOMBIA_FESTIVOS = {
+# Festivos como objetos date (sin strftime por cada día consultado)
+COLOMBIA_FESTIVOS = frozenset(datetime.strptime(f, "%Y-%m-%d").date() for f in (
     "2025-01-01", "2025-05-01", "2025-07-20", "2025-08-07", "2025-12-08", "2025-12-25"
-}
+))
 
 def sha256_file(path):
-    h = hashlib.sha256()
     with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+        # Python 3.11+: lectura y hash en C (OpenSSL, SHA-NI si la CPU lo soporta)
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        try:
+            # mmap entrega el archivo completo a OpenSSL en una sola llamada (mmap falla con archivos vacíos)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        except (ValueError, OSError):
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
 
 def es_dia_habil(fecha: datetime.date):
-    if fecha.weekday() >= 5:
-        return False
-    return fecha.strftime("%Y-%m-%d") not in COLOMBIA_FESTIVOS
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    return fecha.weekday() < 5 and fecha not in COLOMBIA_FESTIVOS
 
 def fecha_limite_habiles(fecha_expedicion: datetime, dias_habiles: int):
     fecha = fecha_expedicion
+    if dias_habiles <= 0:
+        return fecha
+    # Saltar semanas completas (5 días hábiles cada una) y descontar los festivos entre semana del salto
+    semanas, restantes = divmod(dias_habiles, 5)
+    if semanas:
+        inicio = fecha.date()
+        fecha = fecha + timedelta(weeks=semanas)
+        fin = fecha.date()
+        restantes += sum(1 for f in COLOMBIA_FESTIVOS if inicio < f <= fin and f.weekday() < 5)
+        if restantes == 0:
+            # el último hábil del salto es el resultado (se puede haber caído en fin de semana)
+            while not es_dia_habil(fecha):
+                fecha = fecha - timedelta(days=1)
+            return fecha
     contador = 0
-    while contador < dias_habiles:
+    while contador < restantes:
         fecha = fecha + timedelta(days=1)
-        if es_dia_habil(fecha.date()):
+        if es_dia_habil(fecha):
             contador += 1
     return fecha
 
 # ---------------- OCR / imagen ----------------
+# Páginas OCR en paralelo: Tesseract libera el GIL (tesserocr) o corre en subproceso (pytesseract),
+# así que basta un pool de hilos con OMP_THREAD_LIMIT=1 para escalar con los núcleos.
+OCR_WORKERS = os.cpu_count() or 1
+
+# Instancias PyTessBaseAPI reutilizadas entre páginas: una por hilo e idioma (SetImage no es thread-safe).
+_TESS_LOCAL = threading.local()
+
+def _obtener_tess_api(lang='spa'):
+    """Devuelve la instancia PyTessBaseAPI del hilo actual para `lang` (None si no se pudo inicializar)."""
+    apis = getattr(_TESS_LOCAL, "apis", None)
+    if apis is None:
+        apis = _TESS_LOCAL.apis = {}
+    if lang not in apis:
+        try:
+            apis[lang] = PyTessBaseAPI(path=os.environ.get("TESSDATA_PREFIX", TESSDATA_DIR), lang=lang, psm=PSM.AUTO)
+        except Exception as e:
+            logging.warning(f"No se pudo inicializar tesserocr ({lang}), se usará pytesseract: {e}")
+            apis[lang] = None
+    return apis[lang]
+
+def _ocr_tesserocr(pil_image: Image.Image, lang='spa'):
+    """OCR con la API persistente del hilo. Devuelve (texto, confs_por_palabra) o None si tesserocr no está disponible."""
+    api = _obtener_tess_api(lang)
+    if api is None:
+        return None
+    api.SetImage(pil_image)
+    text = " ".join(api.GetUTF8Text().split())
+    confs = api.AllWordConfidences()
+    return text, confs
+
+# Lado máximo de la imagen enviada a Tesseract: por encima de ~300 DPI la precisión no mejora
+# y el tiempo de OCR crece linealmente con los píxeles.
+OCR_MAX_LADO = 2400
+
+def _umbral_otsu(gray: np.ndarray) -> int:
+    """Umbral de Otsu a partir del histograma (fallback sin OpenCV)."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    peso_fondo = np.cumsum(hist)
+    suma_fondo = np.cumsum(hist * np.arange(256))
+    total, suma_total = peso_fondo[-1], suma_fondo[-1]
+    peso_frente = total - peso_fondo
+    with np.errstate(divide="ignore", invalid="ignore"):
+        varianza = (suma_total * peso_fondo - total * suma_fondo) ** 2 / (peso_fondo * peso_frente)
+    return int(np.nanargmax(np.nan_to_num(varianza, nan=-1.0)))
+
+def _prep_for_ocr(pil_image: Image.Image) -> Image.Image:
+    """Escala de grises, reducción a OCR_MAX_LADO (INTER_AREA) y binarización Otsu antes del OCR."""
+    cv2 = _cargar_cv2()
+    gray = pil_image if pil_image.mode == "L" else pil_image.convert("L")
+    lado = max(gray.size)
+    if lado > OCR_MAX_LADO:
+        escala = OCR_MAX_LADO / lado
+        nuevo = (max(1, round(gray.width * escala)), max(1, round(gray.height * escala)))
+        if cv2 is not None:
+            arr = cv2.resize(np.asarray(gray), nuevo, interpolation=cv2.INTER_AREA)
+        else:
+            arr = np.asarray(gray.resize(nuevo, Image.BOX))
+    else:
+        arr = np.asarray(gray)
+    if cv2 is not None:
+        _, bw = cv2.threshold(arr, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    else:
+        bw = np.where(arr > _umbral_otsu(arr), 255, 0).astype(np.uint8)
+    return Image.fromarray(bw)
+
+def _conf_promedio(confs) -> float:
+    """Promedio de las confianzas por palabra, ignorando las negativas (-1 = no es palabra)."""
+    try:
+        arr = np.asarray(confs, dtype=np.float64).ravel()
+    except (TypeError, ValueError):
+        # algún valor no numérico: convertir uno a uno descartando los inválidos
+        vals = []
+        for c in confs:
+            try:
+                vals.append(float(c))
+            except (TypeError, ValueError):
+                pass
+        arr = np.asarray(vals, dtype=np.float64)
+    validas = arr[arr >= 0]
+    return float(validas.mean()) if validas.size else 0.0
+
 def ocr_image_and_confidence(pil_image: Image.Image, lang='spa'):
+    try:
+        pil_image = _prep_for_ocr(pil_image)
+    except Exception as e:
+        logging.debug(f"Preprocesado OCR omitido: {e}")
+    if HAVE_TESSEROCR:
+        try:
+            res = _ocr_tesserocr(pil_image, lang=lang)
+        except Exception as e:
+            logging.warning(f"Error en OCR con tesserocr, se usará pytesseract: {e}")
+            res = None
+        if res is not None:
+            text, confs = res
+            return text, _conf_promedio(confs)
+    pytesseract = _cargar_pytesseract()
     try:
         data = pytesseract.image_to_data(pil_image, lang=lang, output_type=pytesseract.Output.DICT)
     except Exception:
@@ -114,25 +288,148 @@ def ocr_image_and_confidence(pil_image: Image.Image, lang='spa'):
         return text, 0.0
     words = data.get('text', [])
     confs = data.get('conf', [])
-    text = " ".join([w for w in words if w and w.strip()])
-    conf_vals = []
-    for c in confs:
+    text = " ".join(w for w in words if w and w.strip())
+    return text, _conf_promedio(confs)
+
+# Máximo de imágenes por invocación de tesseract con lista de archivos (listas largas pueden colgarse)
+OCR_LOTE_MAX = 50
+
+def _parse_tsv_paginas(lineas, n_paginas):
+    """Agrupa la salida TSV de tesseract por page_num. Devuelve [(texto, conf_promedio)] por página."""
+    palabras = [[] for _ in range(n_paginas)]
+    confs = [[] for _ in range(n_paginas)]
+    for fila in csv.DictReader(lineas, delimiter="\t", quoting=csv.QUOTE_NONE):
         try:
-            ci = float(c)
-            if ci >= 0:
-                conf_vals.append(ci)
-        except:
-            pass
-    avg_conf = float(np.mean(conf_vals)) if conf_vals else 0.0
-    return text, avg_conf
+            idx = int(fila["page_num"]) - 1
+            conf = float(fila["conf"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not 0 <= idx < n_paginas:
+            continue
+        texto = fila.get("text") or ""
+        if texto.strip():
+            palabras[idx].append(texto)
+        if conf >= 0:
+            confs[idx].append(conf)
+    return [(" ".join(w), _conf_promedio(c)) for w, c in zip(palabras, confs)]
+
+def ocr_pages_batch(pil_images, lang='spa'):
+    """
+    OCR de varias páginas con una sola invocación de tesseract: guarda las imágenes en un directorio
+    temporal y le pasa un archivo con la lista de rutas (salida TSV). Evita un proceso por página
+    cuando no está tesserocr. Devuelve [(texto, conf)] en el orden de entrada.
+    """
+    pil_images = list(pil_images)
+    if not pil_images:
+        return []
+    with tempfile.TemporaryDirectory() as d:
+        rutas = []
+        for i, img in enumerate(pil_images):
+            ruta = os.path.join(d, f"p{i}.png")
+            _prep_for_ocr(img).save(ruta, "PNG", optimize=False)
+            rutas.append(ruta)
+        lista = os.path.join(d, "lista.txt")
+        with open(lista, "w", encoding="utf-8") as f:
+            f.write("\n".join(rutas))
+        salida = os.path.join(d, "out")
+        subprocess.run([_tesseract_cmd, lista, salida, "-l", lang, "tsv"],
+                       capture_output=True, check=True)
+        with open(salida + ".tsv", encoding="utf-8", newline="") as f:
+            return _parse_tsv_paginas(f, len(pil_images))
+
+def _ocr_lote_o_individual(images, lang):
+    try:
+        return ocr_pages_batch(images, lang=lang)
+    except Exception as e:
+        logging.warning(f"OCR por lotes falló, se procesa página a página: {e}")
+        return [ocr_image_and_confidence(img, lang=lang) for img in images]
+
+# Pool de OCR del proceso: sus hilos viven lo que el proceso, así que las PyTessBaseAPI de cada hilo
+# (_TESS_LOCAL) se inicializan una sola vez y no en cada tanda de páginas.
+_POOL_OCR = None
+_POOL_OCR_LOCK = threading.Lock()
+
+def _pool_ocr():
+    """Devuelve el pool de OCR del proceso (OCR_WORKERS hilos), creándolo en el primer uso."""
+    global _POOL_OCR
+    with _POOL_OCR_LOCK:
+        if _POOL_OCR is None:
+            _POOL_OCR = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+        return _POOL_OCR
+
+def _reiniciar_pool_ocr():
+    # Un proceso hijo creado con fork hereda el objeto pool pero no sus hilos: crea el suyo propio
+    global _POOL_OCR, _POOL_OCR_LOCK
+    _POOL_OCR = None
+    _POOL_OCR_LOCK = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_pool_ocr)
+
+def _mapear_en_pool_ocr(fn, tareas, workers):
+    """[fn(t) for t in tareas] en el pool de OCR, con a lo sumo `workers` tareas de esta llamada a la vez."""
+    pool = _pool_ocr()
+    workers = max(1, min(workers, len(tareas), OCR_WORKERS))
+    # un trabajo por hilo, cada uno con tareas intercaladas (k, k+workers, ...) para repartir páginas pesadas
+    grupos = [tareas[k::workers] for k in range(workers)]
+    futuros = [pool.submit(lambda grupo: [fn(t) for t in grupo], grupo) for grupo in grupos]
+    resultados = [None] * len(tareas)
+    for k, futuro in enumerate(futuros):
+        resultados[k::workers] = futuro.result()
+    return resultados
+
+def ocr_paginas(images, lang='spa', max_workers=None):
+    """OCR de varias páginas en paralelo. Devuelve [(texto, conf)] en el mismo orden que `images`."""
+    images = list(images)
+    if not images:
+        return []
+    workers = min(max_workers or OCR_WORKERS, len(images))
+    if not HAVE_TESSEROCR and len(images) > 1:
+        # Sin tesserocr: repartir las páginas en lotes (uno o pocos por hilo), cada lote en un solo proceso
+        tam = min(OCR_LOTE_MAX, -(-len(images) // max(workers, 1)))
+        lotes = [images[i:i + tam] for i in range(0, len(images), tam)]
+        return [r for res in _mapear_en_pool_ocr(lambda lote: _ocr_lote_o_individual(lote, lang), lotes, workers)
+                for r in res]
+    return _mapear_en_pool_ocr(lambda img: ocr_image_and_confidence(img, lang=lang), images, workers)
+
+def _contar_tinta_loop(arr, umbral):
+    c = 0
+    for i in range(arr.shape[0]):
+        for j in range(arr.shape[1]):
+            if arr[i, j] <= umbral:
+                c += 1
+    return c
+
+@functools.lru_cache(maxsize=1)
+def _kernel_tinta():
+    """
+    numba (opcional, se importa en el primer uso): compila _contar_tinta_loop.
+    nogil: se ejecuta dentro del pool de OCR sin bloquear los demás hilos. Sin parallel=True porque
+    la capa de hilos por defecto de numba no admite llamadas concurrentes desde varios hilos.
+    cache=True guarda la compilación en disco, así que el costo de JIT se paga una sola vez.
+    """
+    try:
+        from numba import njit
+        return njit(cache=True, nogil=True)(_contar_tinta_loop)
+    except Exception:
+        return None
+
+def _contar_tinta(arr, umbral):
+    kernel = _kernel_tinta()
+    if kernel is None:
+        return int(np.count_nonzero(arr <= umbral))
+    return kernel(arr, umbral)
 
 def detectar_firma_manuscrita(pil_image: Image.Image, thresh=0.03):
-    img = np.array(pil_image.convert("L"))
-    h, w = img.shape
-    roi = img[int(h*0.62):h, 0:w]
-    _, bw = cv2.threshold(roi, 200, 255, cv2.THRESH_BINARY_INV)
-    ratio = (bw > 0).sum() / (bw.size + 1e-9)
-    return ratio > thresh
+    # Recortar la franja inferior antes de convertir a grises: solo se procesa ~38% de la página.
+    # Equivale a cv2.threshold(roi, 200, 255, THRESH_BINARY_INV) + conteo de píxeles activos.
+    w, h = pil_image.size
+    roi = pil_image.crop((0, int(h*0.62), w, h))
+    # las páginas ya llegan en grises (grayscale=True al rasterizar): sin conversión extra
+    arr = np.asarray(roi if roi.mode == "L" else roi.convert("L"))
+    if arr.size == 0:
+        return False
+    return _contar_tinta(arr, 200) / arr.size > thresh
 
 # ---------------- MEJORADO: Expresiones regulares para fechas ----------------
 # Patrones más amplios para capturar diversos formatos de fecha
@@ -151,19 +448,24 @@ RE_DATE_TEXTO = re.compile(
 )
 
 # Patrones específicos para contexto bancario (busca "expedición", "fecha", etc.)
+# Cuantificadores acotados y prefijos comunes factorizados: ante basura de OCR el motor no recorre
+# tramos arbitrariamente largos de separadores antes de descartar la posición.
 RE_DATE_BANCARIA_CONTEXTO = re.compile(
-    r'(?:fecha|expedici[oó]n|expide|emitid[ao]|generad[ao]|cread[ao]|realizad[ao]|elabor[aó]|elaboraci[oó]n)'
-    r'[\s\:\-\.\,]*'
-    r'(\d{1,2}[/\-\.\s\\]+\d{1,2}[/\-\.\s\\]+\d{2,4}|'
-    r'\d{1,2}\s+(?:de\s+)?[A-Za-zÁÉÍÓÚáéíóúñÑ]+\s+(?:de\s+|del?\s+)?\d{2,4})',
+    r'(?:fecha|expedi(?:ci[oó]n|de)|emitid[ao]|generad[ao]|cread[ao]|realizad[ao]|elabor(?:aci[oó]n|[aó]))'
+    r'[\s\:\-\.\,]{0,10}'
+    r'(\d{1,2}[/\-\.\s\\]{1,5}\d{1,2}[/\-\.\s\\]{1,5}\d{2,4}|'
+    r'\d{1,2}\s{1,5}(?:de\s{1,5})?[A-Za-zÁÉÍÓÚáéíóúñÑ]{1,15}\s{1,5}(?:del?\s{1,5})?\d{2,4})',
     re.IGNORECASE
 )
+# Raíces de las palabras de contexto: si ninguna aparece en la página se omite la regex
+_CONTEXTO_FECHA_RAICES = ("fecha", "expedi", "emitid", "generad", "cread", "realizad", "elabor")
 
 # Patrón de compatibilidad (original)
+# Sin grupos de captura: la coincidencia completa (group(0)) es la fecha
 RE_DATE = re.compile(
-    r'\b(\d{1,2})[/\-\.\s](\d{1,2})[/\-\.\s](\d{2,4})\b|'
-    r'\b(\d{2,4})[/\-\.\s](\d{1,2})[/\-\.\s](\d{1,2})\b|'
-    r'\b(\d{1,2})\s*(de|/)\s*([A-Za-z]+)\s*(de|/)\s*(\d{2,4})\b',
+    r'\b\d{1,2}[/\-\.\s]\d{1,2}[/\-\.\s]\d{2,4}\b|'
+    r'\b\d{2,4}[/\-\.\s]\d{1,2}[/\-\.\s]\d{1,2}\b|'
+    r'\b\d{1,2}\s*(?:de|/)\s*[A-Za-z]+\s*(?:de|/)\s*\d{2,4}\b',
     re.IGNORECASE
 )
 
@@ -174,6 +476,9 @@ RE_DATE_BANCARIA = re.compile(
     re.IGNORECASE
 )
 
+# Fechas DD/MM/YY(YY) con separador / - . (estrategia 4)
+RE_DATE_SIMPLE = re.compile(r'\b\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}\b')
+
 # Mapeo expandido de meses en español (incluyendo variaciones)
 MESES_ESPANOL = {
     'enero': 1, 'ene': 1, 'ener': 1,
@@ -190,7 +495,30 @@ MESES_ESPANOL = {
     'diciembre': 12, 'dic': 12, 'dbre': 12
 }
 
+# Prefijos (1 a 3 letras) -> mes, en el orden de MESES_ESPANOL: resuelve en O(1) la misma
+# comparación "startswith en ambos sentidos" sobre los 3 primeros caracteres.
+_MES_PREFIX = {}
+for _nombre, _num in MESES_ESPANOL.items():
+    for _n in (1, 2, 3):
+        _MES_PREFIX.setdefault(_nombre[:_n], _num)
+
+def _mes_desde_nombre(mes_nombre):
+    """Número de mes para un nombre (posiblemente abreviado o con errores de OCR), o None."""
+    mes = _MES_PREFIX.get(mes_nombre[:3])
+    if mes is None and HAVE_RAPIDFUZZ and len(mes_nombre) > 3:
+        encontrado = process.extractOne(mes_nombre, MESES_ESPANOL.keys(), scorer=fuzz.ratio, score_cutoff=85)
+        if encontrado:
+            mes = MESES_ESPANOL[encontrado[0]]
+    return mes
+
 # ---------------- MEJORADO: Funciones para extracción de fechas ----------------
+# Correcciones OCR de limpiar_texto_fecha, compiladas una vez
+_RE_L_AISLADA = re.compile(r'\bl\b')                # l minúscula aislada por 1
+_RE_O_ENTRE_DIGITOS = re.compile(r'(?<=\d)[Oo](?=\d)')  # O/o entre números
+_SIN_BRACKETS = str.maketrans("", "", "[]{}()")
+# Separadores de fecha -> espacio, para partir con str.split()
+_SEP_FECHA_TBL = str.maketrans("/-.\\", "    ")
+
 def limpiar_texto_fecha(texto: str) -> str:
     """
     Limpia el texto para mejorar la detección de fechas.
@@ -201,10 +529,9 @@ def limpiar_texto_fecha(texto: str) -> str:
     
     # Reemplazos comunes de errores OCR
     texto = texto.replace('|', '/')
-    texto = re.sub(r'\bl\b', '1', texto)  # l minúscula aislada por 1
-    texto = re.sub(r'(?<=\d)O(?=\d)', '0', texto)  # O entre números
-    texto = re.sub(r'(?<=\d)o(?=\d)', '0', texto)  # o entre números
-    texto = re.sub(r'[\[\]\{\}\(\)]', '', texto)  # quitar brackets
+    texto = _RE_L_AISLADA.sub('1', texto)
+    texto = _RE_O_ENTRE_DIGITOS.sub('0', texto)
+    texto = texto.translate(_SIN_BRACKETS)  # quitar brackets (después de las regex, que usan \b)
     
     return texto
 
@@ -213,24 +540,32 @@ def extraer_todas_fechas_texto(texto: str, contexto_bancario=False):
     Extrae TODAS las posibles fechas del texto usando múltiples estrategias.
     Devuelve una lista de fechas encontradas ordenadas.
     """
-    fechas_encontradas = []
+    fechas_encontradas = set()
     
     # Limpiar texto
     texto_limpio = limpiar_texto_fecha(texto)
     
     # ESTRATEGIA 1: Buscar fechas con contexto bancario específico
-    if contexto_bancario:
+    # (el texto se pasa a minúsculas una sola vez, no una por raíz)
+    texto_limpio_low = texto_limpio.lower() if contexto_bancario else ""
+    if contexto_bancario and any(r in texto_limpio_low for r in _CONTEXTO_FECHA_RAICES):
         matches_contexto = RE_DATE_BANCARIA_CONTEXTO.finditer(texto_limpio)
         for match in matches_contexto:
             fecha_texto = match.group(1)
             fecha = parsear_fecha_flexible(fecha_texto)
             if fecha:
-                fechas_encontradas.append(fecha)
+                fechas_encontradas.add(fecha)
                 logging.debug(f"Fecha encontrada con contexto bancario: {fecha} de '{fecha_texto}'")
     
+    # Cada estrategia recorre el texto por separado (sus coincidencias pueden solaparse);
+    # la misma coincidencia repetida en la página no se vuelve a convertir
+    
     # ESTRATEGIA 2: Buscar fechas con nombre de mes
-    matches_texto = RE_DATE_TEXTO.finditer(texto_limpio)
-    for match in matches_texto:
+    vistos = set()
+    for match in RE_DATE_TEXTO.finditer(texto_limpio):
+        if match.group(0) in vistos:
+            continue
+        vistos.add(match.group(0))
         try:
             dia = int(match.group(1))
             mes_nombre = match.group(2).lower().strip()
@@ -241,66 +576,92 @@ def extraer_todas_fechas_texto(texto: str, contexto_bancario=False):
                 año += 2000 if año < 50 else 1900
             
             # Buscar mes en el diccionario (fuzzy match)
-            mes = None
-            for key, value in MESES_ESPANOL.items():
-                if mes_nombre.startswith(key[:3]) or key.startswith(mes_nombre[:3]):
-                    mes = value
-                    break
+            mes = _mes_desde_nombre(mes_nombre)
             
             if mes and 1 <= dia <= 31 and 1900 <= año <= 2100:
                 fecha = datetime(año, mes, dia).date()
-                fechas_encontradas.append(fecha)
+                fechas_encontradas.add(fecha)
                 logging.debug(f"Fecha encontrada con texto: {fecha} de '{match.group(0)}'")
         except (ValueError, AttributeError) as e:
             logging.debug(f"Error parseando fecha con texto: {e}")
             continue
     
     # ESTRATEGIA 3: Buscar fechas numéricas puras
-    matches_numeric = RE_DATE_NUMERIC.finditer(texto_limpio)
-    for match in matches_numeric:
-        # Probar diferentes grupos de captura
-        for i in range(1, 7, 3):
-            if match.group(i) and match.group(i+1) and match.group(i+2):
-                try:
-                    num1 = int(match.group(i))
-                    num2 = int(match.group(i+1))
-                    num3 = int(match.group(i+2))
-                    
-                    # Ajustar año si es de 2 dígitos
-                    if num3 < 100:
-                        num3 += 2000 if num3 < 50 else 1900
-                    
-                    # Intentar DD/MM/YYYY primero (formato latinoamericano)
-                    if 1 <= num1 <= 31 and 1 <= num2 <= 12 and 1900 <= num3 <= 2100:
-                        fecha = datetime(num3, num2, num1).date()
-                        fechas_encontradas.append(fecha)
-                        logging.debug(f"Fecha encontrada numérica (DD/MM/YYYY): {fecha} de '{match.group(0)}'")
-                    # Intentar YYYY/MM/DD
-                    elif 1900 <= num1 <= 2100 and 1 <= num2 <= 12 and 1 <= num3 <= 31:
-                        fecha = datetime(num1, num2, num3).date()
-                        fechas_encontradas.append(fecha)
-                        logging.debug(f"Fecha encontrada numérica (YYYY/MM/DD): {fecha} de '{match.group(0)}'")
-                    break
-                except (ValueError, AttributeError) as e:
-                    logging.debug(f"Error parseando fecha numérica: {e}")
-                    continue
-    
-    # ESTRATEGIA 4: Usar dateutil como último recurso (muy permisivo)
-    # Buscar patrones que parezcan fechas y probar con dateutil
-    palabras_fecha = re.findall(r'\b\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{2,4}\b', texto_limpio)
-    for palabra in palabras_fecha:
+    vistos = set()
+    for match in RE_DATE_NUMERIC.finditer(texto_limpio):
+        if match.group(0) in vistos:
+            continue
+        vistos.add(match.group(0))
+        # Grupos 1-3 (DD/MM/YYYY) o 4-6 (YYYY/MM/DD)
+        i = 1 if match.group(1) else 4
         try:
-            fecha = parse_date(palabra, dayfirst=True).date()
-            if 1900 <= fecha.year <= 2100:
-                fechas_encontradas.append(fecha)
-                logging.debug(f"Fecha encontrada con dateutil: {fecha} de '{palabra}'")
-        except:
+            num1 = int(match.group(i))
+            num2 = int(match.group(i+1))
+            num3 = int(match.group(i+2))
+            
+            # Ajustar año si es de 2 dígitos
+            if num3 < 100:
+                num3 += 2000 if num3 < 50 else 1900
+            
+            # Intentar DD/MM/YYYY primero (formato latinoamericano)
+            if 1 <= num1 <= 31 and 1 <= num2 <= 12 and 1900 <= num3 <= 2100:
+                fecha = datetime(num3, num2, num1).date()
+                fechas_encontradas.add(fecha)
+                logging.debug(f"Fecha encontrada numérica (DD/MM/YYYY): {fecha} de '{match.group(0)}'")
+            # Intentar YYYY/MM/DD
+            elif 1900 <= num1 <= 2100 and 1 <= num2 <= 12 and 1 <= num3 <= 31:
+                fecha = datetime(num1, num2, num3).date()
+                fechas_encontradas.add(fecha)
+                logging.debug(f"Fecha encontrada numérica (YYYY/MM/DD): {fecha} de '{match.group(0)}'")
+        except (ValueError, AttributeError) as e:
+            logging.debug(f"Error parseando fecha numérica: {e}")
             continue
     
-    # Eliminar duplicados y ordenar
-    fechas_unicas = sorted(list(set(fechas_encontradas)))
+    # ESTRATEGIA 4: DD/MM/YY(YY) con dateutil (permite MM/DD si el segundo número no es mes);
+    # los anchos fijos se resuelven sin dateutil
+    for palabra in set(RE_DATE_SIMPLE.findall(texto_limpio)):
+        fecha = _fecha_numerica_rapida(palabra)
+        if fecha is None:
+            try:
+                fecha = parse_date(palabra, dayfirst=True).date()
+            except (ValueError, OverflowError):
+                continue
+            if not 1900 <= fecha.year <= 2100:
+                continue
+        fechas_encontradas.add(fecha)
+        logging.debug(f"Fecha encontrada con dateutil: {fecha} de '{palabra}'")
     
-    return fechas_unicas
+    return sorted(fechas_encontradas)
+
+def _fecha_numerica_rapida(s: str):
+    """
+    Camino rápido sin dateutil para 'DD/MM/YYYY', 'DD/MM/YY' y 'YYYY-MM-DD' (separadores / - .).
+    Devuelve None si el texto no tiene exactamente esa forma o la fecha no es válida.
+    """
+    n = len(s)
+    if n in (8, 10) and s[2] in "/-." and s[5] == s[2]:
+        dia, mes, año = s[0:2], s[3:5], s[6:]
+    elif n == 10 and s[4] in "/-." and s[7] == s[4]:
+        año, mes, dia = s[0:4], s[5:7], s[8:10]
+    else:
+        return None
+    digitos = dia + mes + año
+    if not (digitos.isascii() and digitos.isdigit()):
+        return None
+    año_2_digitos = len(año) == 2
+    dia, mes, año = int(dia), int(mes), int(año)
+    if año_2_digitos:
+        # misma ventana de siglo que dateutil: el año más cercano (±50) al actual
+        actual = datetime.now().year
+        año += actual // 100 * 100
+        if abs(año - actual) >= 50:
+            año += 100 if año < actual else -100
+    if not (1 <= dia <= 31 and 1 <= mes <= 12 and 1900 <= año <= 2100):
+        return None
+    try:
+        return datetime(año, mes, dia).date()
+    except ValueError:
+        return None
 
 def parsear_fecha_flexible(fecha_texto: str):
     """
@@ -313,7 +674,12 @@ def parsear_fecha_flexible(fecha_texto: str):
     # Limpiar el texto
     fecha_texto = limpiar_texto_fecha(fecha_texto.strip())
     
-    # Intentar con dateutil primero (más flexible)
+    # Formatos numéricos de ancho fijo: sin dateutil
+    fecha = _fecha_numerica_rapida(fecha_texto)
+    if fecha:
+        return fecha
+    
+    # Intentar con dateutil (más flexible)
     try:
         fecha = parse_date(fecha_texto, dayfirst=True).date()
         if 1900 <= fecha.year <= 2100:
@@ -323,7 +689,7 @@ def parsear_fecha_flexible(fecha_texto: str):
     
     # Intentar con formato específico DD/MM/YYYY con varios separadores
     try:
-        partes = re.split(r'[/\-\.\s\\]+', fecha_texto)
+        partes = fecha_texto.translate(_SEP_FECHA_TBL).split()
         if len(partes) == 3:
             dia, mes, año = map(int, partes)
             if año < 100:
@@ -344,9 +710,9 @@ def parsear_fecha_flexible(fecha_texto: str):
             if año < 100:
                 año += 2000 if año < 50 else 1900
             
-            for key, value in MESES_ESPANOL.items():
-                if mes_nombre.startswith(key[:3]) or key.startswith(mes_nombre[:3]):
-                    return datetime(año, value, dia).date()
+            mes = _mes_desde_nombre(mes_nombre)
+            if mes:
+                return datetime(año, mes, dia).date()
         except:
             pass
     
@@ -431,38 +797,87 @@ DOC_KEYWORDS = {
     ]
 }
 
+def crear_buscador_patrones(patrones):
+    """
+    Construye una función texto -> set(patrones presentes como substring).
+    Usa un autómata Aho-Corasick (una sola pasada por el texto) si pyahocorasick está instalado;
+    si no, recorre los patrones con `in`.
+    """
+    patrones = tuple(dict.fromkeys(p for p in patrones if p))
+    if HAVE_AHOCORASICK and patrones:
+        automata = ahocorasick.Automaton()
+        for p in patrones:
+            automata.add_word(p, p)
+        automata.make_automaton()
+        return lambda texto: {p for _, p in automata.iter(texto)} if texto else set()
+    return lambda texto: {p for p in patrones if p in texto}
+
+# Tabla de tildes para str.translate (un solo recorrido en C en lugar de cinco .replace encadenados)
+_ACCENT_TBL = str.maketrans("áéíóú", "aeiou")
+# Puntuación y espacios en una sola regex: [^\w\s] ∪ \s = \W, así que cada tramo no alfanumérico
+# se reduce a un espacio (equivale a quitar puntuación y después colapsar espacios)
+_NO_PALABRA_RE = re.compile(r'\W+')
+
+def _normalizar_keyword(keyword):
+    return keyword.lower().translate(_ACCENT_TBL)
+
+def _indexar_keywords(keywords):
+    """
+    ((keyword_normalizada, veces, palabras_si_es_frase), ...) para un tipo de documento.
+    Variantes que normalizan igual ("cámara de comercio"/"camara de comercio") se agrupan en una sola
+    entrada con su multiplicidad (cada una sigue sumando puntos); las cadenas quedan internadas.
+    """
+    veces = {}
+    for kw in keywords:
+        kwn = sys.intern(_normalizar_keyword(kw))
+        veces[kwn] = veces.get(kwn, 0) + 1
+    entradas = []
+    for kwn, n in veces.items():
+        palabras = kwn.split()
+        entradas.append((kwn, n, frozenset(map(sys.intern, palabras)) if len(palabras) > 1 else None))
+    return tuple(entradas)
+
+# Índice de keywords construido al importar: {doc_type: ((keyword, veces, frozenset(palabras) | None), ...)}
+_KW_INDEX = {doc_type: _indexar_keywords(keywords) for doc_type, keywords in DOC_KEYWORDS.items()}
+# Un único autómata con todas las keywords y las palabras de las frases compuestas
+_buscar_doc_keywords = crear_buscador_patrones(
+    [kwn for entradas in _KW_INDEX.values() for kwn, _, _ in entradas] +
+    [p for entradas in _KW_INDEX.values() for _, _, palabras in entradas if palabras for p in palabras]
+)
+
+@functools.lru_cache(maxsize=1024)
+def _hits_nombre_archivo(nombre_archivo):
+    """Keywords presentes en el nombre de archivo; se calcula una vez por archivo, no por página."""
+    return frozenset(_buscar_doc_keywords(nombre_archivo.lower()))
+
 def clasificar_documento_robusto(nombre_archivo, texto_ocr):
     """
     Clasificación robusta que combina nombre de archivo y contenido OCR
     con puntuación ponderada y verificación de contexto.
     """
-    # Combinar nombre del archivo y texto OCR
-    texto_completo = f"{nombre_archivo} {texto_ocr}".lower()
+    # Combinar nombre del archivo y texto OCR y normalizar una sola vez (tildes, puntuación, espacios)
+    texto_completo = _NO_PALABRA_RE.sub(' ', _normalizar_keyword(f"{nombre_archivo} {texto_ocr}")).strip()
     
-    # Normalización extensiva
-    texto_completo = texto_completo.replace('á', 'a').replace('é', 'e').replace('í', 'i').replace('ó', 'o').replace('ú', 'u')
-    texto_completo = re.sub(r'[^\w\s]', ' ', texto_completo)  # Remover puntuación
-    texto_completo = re.sub(r'\s+', ' ', texto_completo).strip()
+    # Una pasada por el nombre y otra por el texto; el puntaje se arma con búsquedas en sets
+    en_nombre = _hits_nombre_archivo(nombre_archivo)
+    en_texto = _buscar_doc_keywords(texto_completo)
     
     scores = {}
     
-    for doc_type, keywords in DOC_KEYWORDS.items():
+    for doc_type, entradas in _KW_INDEX.items():
         score = 0
-        for keyword in keywords:
-            keyword_normalized = keyword.lower().replace('á', 'a').replace('é', 'e').replace('í', 'i').replace('ó', 'o').replace('ú', 'u')
-            
+        for keyword_normalized, veces, palabras_keyword in entradas:
+            puntos = 0
             # Puntuación ponderada: más puntos por coincidencias en nombre de archivo
-            if keyword_normalized in nombre_archivo.lower():
-                score += 3  # Peso alto para nombre de archivo
-            if keyword_normalized in texto_completo:
-                score += 1  # Peso normal para contenido
+            if keyword_normalized in en_nombre:
+                puntos += 3  # Peso alto para nombre de archivo
+            if keyword_normalized in en_texto:
+                puntos += 1  # Peso normal para contenido
             
-            # Búsqueda de palabras individuales para contexto
-            palabras_keyword = keyword_normalized.split()
-            if len(palabras_keyword) > 1:
-                # Bonus si todas las palabras de la keyword aparecen (en cualquier orden)
-                if all(palabra in texto_completo for palabra in palabras_keyword):
-                    score += 2
+            # Bonus si todas las palabras de la keyword aparecen (en cualquier orden)
+            if palabras_keyword and palabras_keyword <= en_texto:
+                puntos += 2
+            score += puntos * veces
         
         scores[doc_type] = score
     
@@ -487,6 +902,10 @@ def clasificar_pagina(nombre_archivo, texto: str):
     """Clasificar página con nombre de archivo y contenido"""
     return clasificar_documento_robusto(nombre_archivo, texto)
 
+# Palabras que marcan una página como bancaria, en una sola pasada por el texto en minúsculas
+# ("bancaria" ya cubre "certificación/certificacion bancaria")
+RE_CONTEXTO_BANCARIO = re.compile(r"certificado bancario|banco|cuenta|bancaria|entidad financiera")
+
 RE_NIT = re.compile(r"\b(?:NIT[:\s\-]*|NIT\.?[:\s\-]*|NIT\s*)?(\d{6,12})\b")
 RE_CEDULA = re.compile(r"\b(?:C[-\s]?C[:\s\-]*|Cédula|Cedula|Cédula de Ciudadanía|CC[:\s\-]*)\s*[:#]?\s*(\d{6,12})\b", re.IGNORECASE)
 
@@ -641,13 +1060,37 @@ CHECKLIST = {
 # ---------------- utilidad: normalizar texto (para nombres de archivos) ----------------
 STOPWORDS = {"de","del","la","el","los","las","y","s","sa","sas","s.a.s","sas.","sa.","empresa","empresa."}
 
+# Tildes del español resueltas con una tabla (str.translate recorre el texto en C)
+_STRIP_ACCENTS = str.maketrans("áéíóúüÁÉÍÓÚÜñÑ", "aeiouuAEIOUUnN")
+
 def quitar_acentos(text: str) -> str:
-    """Quita tildes/diacríticos (normalización NFKD)."""
+    """Quita tildes/diacríticos (tabla para el español; NFKD solo si quedan caracteres no ASCII)."""
     if not text:
         return ""
+    text = text.translate(_STRIP_ACCENTS)
+    if text.isascii():
+        return text
     nfkd = unicodedata.normalize("NFKD", text)
     return "".join([c for c in nfkd if not unicodedata.combining(c)])
 
+# Regex de normalizar_texto compiladas una vez. Los sufijos ruidosos truncan el nombre desde el primero
+# que aparezca, así que van en una sola alternancia (equivale a aplicarlos uno tras otro).
+_RE_EXT_PDF = re.compile(r'\.pdf', re.IGNORECASE)
+_RE_RUIDO_NOMBRE = re.compile(
+    r'\b\d{1,2}\-mail\b.*'            # 01-MAIL...
+    r'|\s*[-\|–]\s*no\..*'            # - No. ...
+    r'|\s*\bnis\b.*'                  # NIS ...
+    r'|\s*\bradicad[oa]?\b.*'         # radicado...
+    r'|\b(?:anexos|respuestas|internas)\b.*',
+    re.IGNORECASE
+)
+_RE_ENTRE_BRACKETS = re.compile(r'[\(\[\{].*?[\)\]\}]')   # texto entre paréntesis/brackets
+_RE_TICKETID = re.compile(r'ticketid[_\-]?\d+', re.IGNORECASE)
+_RE_NUMEROS_LARGOS = re.compile(r'\b\d{5,}\b')             # secuencias largas de números
+_RE_SEPARADORES = re.compile(r'[_\-\.\,;:\/\\]+')
+_RE_NO_ALFANUM = re.compile(r'[^a-z0-9ñáéíóú\s]')
+
+@functools.lru_cache(maxsize=4096)
 def normalizar_texto(s: str) -> str:
     """
     Normaliza texto: minúsculas, quita sufijos ruidosos, elimina caracteres no alfanuméricos,
@@ -658,24 +1101,19 @@ def normalizar_texto(s: str) -> str:
     s = s.lower()
 
     # quitar extensión .pdf
-    s = re.sub(r'\.pdf', '', s, flags=re.IGNORECASE)    
+    s = _RE_EXT_PDF.sub('', s)
 
     # patrones ruidosos comunes para truncar el filename (si existen)
-    s = re.sub(r'(?i)\b\d{1,2}\-mail\b.*', '', s)      # 01-MAIL...
-    s = re.sub(r'(?i)\s*[-\|–]\s*no\..*', '', s)       # - No. ...
-    s = re.sub(r'(?i)\s*\bnis\b.*', '', s)             # NIS ...
-    s = re.sub(r'(?i)\s*\bradicad[oa]?\b.*', '', s)    # radicado...
-    s = re.sub(r'(?i)\b(anexos|respuestas|internas)\b.*', '', s)
-    s = re.sub(r'[\(\[\{].*?[\)\]\}]', ' ', s)         # quitar texto entre paréntesis/brackets
-    s = re.sub(r'ticketid[_\-]?\d+', ' ', s, flags=re.IGNORECASE)
-    s = re.sub(r'\b\d{5,}\b', ' ', s)                 # secuencias largas de números
+    s = _RE_RUIDO_NOMBRE.sub('', s)
+    s = _RE_ENTRE_BRACKETS.sub(' ', s)
+    s = _RE_TICKETID.sub(' ', s)
+    s = _RE_NUMEROS_LARGOS.sub(' ', s)
 
     # limpieza general de separadores y caracteres
-    s = re.sub(r'[_\-\.\,;:\/\\]+', ' ', s)
-    s = re.sub(r'[^a-z0-9ñáéíóú\s]', ' ', s)
+    s = _RE_SEPARADORES.sub(' ', s)
+    s = _RE_NO_ALFANUM.sub(' ', s)
     s = quitar_acentos(s)
-    s = re.sub(r'\s+', ' ', s).strip()
-    return s
+    return " ".join(s.split())
 
 def tokens_utiles(s: str):
     s = normalizar_texto(s)
@@ -683,6 +1121,29 @@ def tokens_utiles(s: str):
     return toks
 
 # ---------------- Inferencia directa por substring en filename (DESEADO) ----------------
+def _frases_items_checklist(checklist_items):
+    """
+    Frases normalizadas por ítem: ((item_id, (frase, ...)), ...), con título + keywords,
+    sin duplicados y las más largas primero (priorizar frases compuestas).
+    """
+    resultado = []
+    for item in checklist_items:
+        frases = [normalizar_texto(item.get("titulo", ""))]
+        frases += [normalizar_texto(kw) for kw in item.get("keywords", [])]
+        frases = sorted(dict.fromkeys(f for f in frases if f), key=lambda x: -len(x))
+        resultado.append((item["id"], tuple(frases)))
+    return tuple(resultado)
+
+# El checklist es estático: sus frases normalizadas se calculan una sola vez al cargar el módulo
+_CHECKLIST_NORM = {tipo: _frases_items_checklist(items) for tipo, items in CHECKLIST.items()}
+# Un autómata por tipo con todas sus frases: una sola pasada por el nombre en lugar de `frase in nm` por frase
+_BUSCAR_FRASES_CHECKLIST = {
+    tipo: crear_buscador_patrones([f for _, frases in items for f in frases])
+    for tipo, items in _CHECKLIST_NORM.items()
+}
+# markers que sugieren "todo-en-uno" -> no inferimos individualmente
+_TODO_MARKERS = ("todo", "completo", "completa", "documentos", "documento", "anexo", "anexos", "adjuntos", "adjunto", "todos")
+
 def inferir_items_desde_nombre(nombre_archivo, tipo_devolucion):
     """
     Inferir items buscándolos directamente como SUBSTRINGs en el filename normalizado.
@@ -699,36 +1160,24 @@ def inferir_items_desde_nombre(nombre_archivo, tipo_devolucion):
     if not nm:
         return []
 
-    # markers que sugieren "todo-en-uno" -> no inferimos individualmente
-    todo_markers = {"todo", "completo", "completa", "documentos", "documento", "anexo", "anexos", "adjuntos", "adjunto", "todos"}
-    if any(m in nm for m in todo_markers):
+    if any(m in nm for m in _TODO_MARKERS):
         logging.info(f"Filename '{nombre_archivo}' marcado como 'todo' (marker detectado) -> evaluar todos los ítems")
         return []
 
-    checklist_items = CHECKLIST["misional"] if tipo_devolucion == "misional" else CHECKLIST["no_misional"]
     detected = []
 
-    # Recorremos items y sus keywords + título; si alguna frase aparece en nm -> lo asociamos
-    for item in checklist_items:
-        # construir lista de frases a verificar: título normalizado + keywords normalizadas
-        frases = []
-        titulo_norm = normalizar_texto(item.get("titulo", ""))
-        if titulo_norm:
-            frases.append(titulo_norm)
-        for kw in item.get("keywords", []):
-            kwn = normalizar_texto(kw)
-            if kwn:
-                frases.append(kwn)
-
-        # deduplicate and sort longer phrases first (priorizar frases compuestas)
-        frases = sorted(list(dict.fromkeys(frases)), key=lambda x: -len(x))
-
+    # Recorremos items y sus frases (título + keywords normalizadas); si alguna aparece en nm -> lo asociamos
+    tipo = "misional" if tipo_devolucion == "misional" else "no_misional"
+    presentes = _BUSCAR_FRASES_CHECKLIST[tipo](nm)
+    if not presentes:
+        return []
+    for item_id, frases in _CHECKLIST_NORM[tipo]:
         for frase in frases:
-            # buscamos la frase como substring en nm
+            # frases presentes como substring en nm (más largas primero)
             # ejemplo: frase="certificacion bancaria" -> detecta "certificacion bancaria 123"
-            if frase and frase in nm:
-                detected.append(item["id"])
-                logging.info(f"Archivo '{nombre_archivo}' contiene frase '{frase}' -> item {item['id']}")
+            if frase in presentes:
+                detected.append(item_id)
+                logging.info(f"Archivo '{nombre_archivo}' contiene frase '{frase}' -> item {item_id}")
                 break  # no necesitamos chequear más frases del mismo item
 
     # si encontramos items -> devolver la lista (sin duplicados)
@@ -740,7 +1189,7 @@ def inferir_items_desde_nombre(nombre_archivo, tipo_devolucion):
 # ---------------- NUEVO: Rellenar plantilla Excel con resultados de checklist ----------------
 def fill_template_with_checklist(template_path: str,
                                  out_path: str,
-                                 df_check: pd.DataFrame,
+                                 df_check: "pd.DataFrame",
                                  status_col_letter: str = 'E',
                                  mapping_mode: str = 'auto',  # 'auto'|'itemid'|'title'
                                  fuzzy_threshold: int = 75,
@@ -756,6 +1205,8 @@ def fill_template_with_checklist(template_path: str,
     - extra_fields: dict cell->value para rellenar celdas específicas (ej. {'B2': '01/11/2025', 'B3': 'Empresa X'})
     Returns: dict con conteo escrito y lista de coincidencias no encontradas
     """
+    from openpyxl import load_workbook
+
     if extra_fields is None:
         extra_fields = {}
 
@@ -765,26 +1216,29 @@ def fill_template_with_checklist(template_path: str,
     def norm_cell_text(x):
         if x is None:
             return ""
-        return re.sub(r'\s+', ' ', str(x).strip()).lower()
+        # split() sin argumentos colapsa los espacios (y quita los de los extremos) sin pasar por regex
+        return " ".join(str(x).split()).lower()
 
     # Build lookup structures from df_check
     # normalize keys
     lookup_by_itemid = {}
     lookup_by_title = {}
-    for _, r in df_check.iterrows():
-        iid = str(r.get("ItemID") or "").strip()
-        title = norm_cell_text(r.get("Item") or "")
-        estado = r.get("Estado", "")
+    # Columnas como listas de Python (sin iterrows, que construye una Series por fila)
+    def columna(nombre, defecto):
+        return df_check[nombre].tolist() if nombre in df_check.columns else [defecto] * len(df_check)
+
+    for iid_val, item_val, estado in zip(columna("ItemID", None), columna("Item", None), columna("Estado", "")):
+        iid = str(iid_val or "").strip()
+        title = norm_cell_text(item_val or "")
         if iid:
             lookup_by_itemid[iid] = estado
         if title:
             lookup_by_title[title] = estado
 
-    written = 0
     not_found = []
 
     # find header row and possible columns
-    first_row = [c.value for c in next(ws.iter_rows(min_row=1, max_row=1, values_only=True))]
+    first_row = list(next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ()))
     header_map = {}
     for idx, h in enumerate(first_row):
         if h is None:
@@ -820,87 +1274,76 @@ def fill_template_with_checklist(template_path: str,
 
     status_col_idx = ord(status_col_letter.upper()) - ord('A')  # 0-based
 
+    # Leer solo las columnas que se van a comparar, como valores planos (values_only: sin objetos Cell).
     # If no header mapping for itemid and mapping_mode=itemid, we'll fallback to scanning rows
-    # Iterate all rows and try to match
-    for row in ws.iter_rows(min_row=2):  # assume header at row 1
-        row_idx = row[0].row
-        written_this_row = False
+    if use_itemid:
+        col_min, col_max = (itemid_col_idx + 1,) * 2 if itemid_col_idx is not None else (1, ws.max_column)
+    else:
+        col_min, col_max = (title_col_idx + 1,) * 2 if title_col_idx is not None else (1, min(6, ws.max_column))
+
+    # Candidatos para el fuzzy match (una sola lista, reutilizada en todas las filas)
+    iid_choices = list(lookup_by_itemid)
+    title_choices = list(lookup_by_title)
+
+    # Primera pasada: resolver el estado de cada fila; las escrituras se aplican todas al final
+    pendientes = []  # (row_idx, estado)
+    filas = ws.iter_rows(min_row=2, min_col=col_min, max_col=col_max, values_only=True) if (use_itemid or use_title) else ()
+    for row_idx, valores in enumerate(filas, start=2):  # assume header at row 1
         # 1) itemid mapping
         if use_itemid:
-            if itemid_col_idx is not None and itemid_col_idx < len(row):
-                cell_val = row[itemid_col_idx].value
+            if itemid_col_idx is not None:
+                cell_val = valores[0]
                 if cell_val is not None:
                     key = str(cell_val).strip()
                     if key in lookup_by_itemid:
-                        ws.cell(row=row_idx, column=status_col_idx+1, value=lookup_by_itemid[key])
-                        written += 1
-                        written_this_row = True
+                        pendientes.append((row_idx, lookup_by_itemid[key]))
                     else:
                         # fuzzy attempt on itemid strings (if available)
                         if HAVE_RAPIDFUZZ:
-                            best = None
-                            best_score = 0
-                            for iid_k, est in lookup_by_itemid.items():
-                                score = fuzz.partial_ratio(str(iid_k), str(key))
-                                if score > best_score:
-                                    best_score = score
-                                    best = iid_k
-                            if best_score >= fuzzy_threshold:
-                                ws.cell(row=row_idx, column=status_col_idx+1, value=lookup_by_itemid[best])
-                                written += 1
-                                written_this_row = True
+                            hit = process.extractOne(key, iid_choices, scorer=fuzz.partial_ratio,
+                                                     processor=None, score_cutoff=fuzzy_threshold)
+                            if hit and hit[1] > 0:
+                                pendientes.append((row_idx, lookup_by_itemid[hit[0]]))
             else:
                 # fallback: scan entire row values for itemid text match
-                for c in row:
-                    val = c.value
+                for val in valores:
                     if val is None:
                         continue
                     val_s = str(val).strip()
                     if val_s in lookup_by_itemid:
-                        ws.cell(row=row_idx, column=status_col_idx+1, value=lookup_by_itemid[val_s])
-                        written += 1
-                        written_this_row = True
+                        pendientes.append((row_idx, lookup_by_itemid[val_s]))
                         break
         # 2) title mapping
-        if (not written_this_row) and use_title:
-            # Prefer title col if known
-            cell_text = ""
-            if title_col_idx is not None and title_col_idx < len(row):
-                cell_text = norm_cell_text(row[title_col_idx].value)
+        elif use_title:
+            # Prefer title col if known; si no, los primeros (hasta 6) valores de la fila
+            if title_col_idx is not None:
+                cell_text = norm_cell_text(valores[0])
             else:
-                # fallback to scanning a few likely columns (0..5)
-                possible = []
-                for c in row[:6]:
-                    possible.append(norm_cell_text(c.value))
-                cell_text = " ".join(possible)
+                cell_text = " ".join(norm_cell_text(v) for v in valores)
             matched = False
             # exact / substring match first
             for title_norm, estado in lookup_by_title.items():
                 if title_norm and title_norm in cell_text:
-                    ws.cell(row=row_idx, column=status_col_idx+1, value=estado)
-                    written += 1
+                    pendientes.append((row_idx, estado))
                     matched = True
                     break
             if not matched and HAVE_RAPIDFUZZ:
-                # fuzzy best match (compare title_norm vs cell_text)
-                best_title = None
-                best_score = 0
-                for title_norm, estado in lookup_by_title.items():
-                    try:
-                        score = fuzz.partial_ratio(title_norm, cell_text)
-                    except Exception:
-                        score = 0
-                    if score > best_score:
-                        best_score = score
-                        best_title = title_norm
-                if best_score >= fuzzy_threshold:
-                    ws.cell(row=row_idx, column=status_col_idx+1, value=lookup_by_title[best_title])
-                    written += 1
+                # fuzzy best match (compare title_norm vs cell_text); extractOne corta con score_cutoff
+                hit = process.extractOne(cell_text, title_choices, scorer=fuzz.partial_ratio,
+                                         processor=None, score_cutoff=fuzzy_threshold)
+                if hit and hit[1] > 0:
+                    pendientes.append((row_idx, lookup_by_title[hit[0]]))
                     matched = True
             if not matched:
                 # nothing matched -> collect for report
                 not_found.append((row_idx, cell_text))
 
+    # Segunda pasada: escribir los estados resueltos en la columna de estado
+    status_col = status_col_idx + 1
+    for row_idx, estado in pendientes:
+        ws.cell(row=row_idx, column=status_col, value=estado)
+    written = len(pendientes)
+
     # write extra fields (cell addresses)
     for cell_addr, val in (extra_fields or {}).items():
         try:
@@ -913,22 +1356,146 @@ def fill_template_with_checklist(template_path: str,
     return {"written": written, "not_found": not_found}
 
 # ---------------- procesamiento PDF -> páginas ----------------
-def procesar_pdf_a_paginas(path_pdf, poppler_path=None):
+# Resolución de rasterizado: DPI_RASTER (la de siempre, CLI y modo alta calidad) y DPI_RAPIDO (UI por defecto).
+# Tesseract es O(píxeles): 150 DPI son ~56% de los píxeles de 200 y bastan para certificados escaneados.
+DPI_RASTER = 200
+DPI_RAPIDO = 150
+
+def _rasterizar_pymupdf(path_pdf, dpi=DPI_RASTER):
+    """Páginas del PDF como imágenes PIL en escala de grises, renderizadas con PyMuPDF."""
+    import pymupdf
+    with pymupdf.open(path_pdf) as doc:
+        pixmaps = (pagina.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY) for pagina in doc)
+        return [Image.frombytes("L", (pix.width, pix.height), pix.samples) for pix in pixmaps]
+
+def procesar_pdf_a_paginas(path_pdf, poppler_path=None, dpi=DPI_RASTER):
+    if HAVE_PYMUPDF:
+        try:
+            return _rasterizar_pymupdf(path_pdf, dpi)
+        except Exception as e:
+            logging.warning(f"PyMuPDF no pudo rasterizar {path_pdf} ({e}); se usa poppler")
+    from pdf2image import convert_from_path
     try:
-        images = convert_from_path(path_pdf, dpi=200, poppler_path=poppler_path) if poppler_path else convert_from_path(path_pdf, dpi=200)
+        # thread_count reparte la rasterización de poppler entre varios procesos pdftoppm;
+        # grayscale: poppler entrega directamente páginas en escala de grises (1/3 de memoria, sin convert("L"))
+        images = convert_from_path(path_pdf, dpi=dpi, poppler_path=poppler_path, thread_count=OCR_WORKERS, grayscale=True) if poppler_path else convert_from_path(path_pdf, dpi=dpi, thread_count=OCR_WORKERS, grayscale=True)
         return images
     except Exception as e:
         logging.error(f"Error al convertir PDF a imágenes ({path_pdf}): {e}")
         raise
 
+# Páginas nacidas digitales: con al menos este texto embebido (caracteres) no se pasan por OCR
+TEXTO_NATIVO_MIN = 100
+# Páginas rasterizadas que pueden esperar su OCR en memoria (cola productor/consumidor acotada)
+PAGINAS_EN_COLA = max(4, 2 * OCR_WORKERS)
+
+def _iterar_paginas(path_pdf, poppler_path=None, dpi=DPI_RASTER, max_paginas=None):
+    """
+    Genera (imagen, texto_embebido) página a página, sin rasterizar el PDF entero en memoria.
+    PyMuPDF renderiza cada página al pedirla; con poppler, pdftoppm escribe las páginas a disco
+    y se abren de una en una (sin texto embebido). max_paginas limita a las primeras páginas.
+    Mientras el generador no termine o se cierre (.close()) el PDF sigue abierto.
+    """
+    doc = None
+    if HAVE_PYMUPDF:
+        import pymupdf
+        try:
+            doc = pymupdf.open(path_pdf)
+        except Exception as e:
+            logging.warning(f"PyMuPDF no pudo abrir {path_pdf} ({e}); se usa poppler")
+    if doc is not None:
+        with doc:
+            for pagina in itertools.islice(doc, max_paginas):
+                pix = pagina.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY)
+                yield Image.frombytes("L", (pix.width, pix.height), pix.samples), " ".join(pagina.get_text().split())
+        return
+    from pdf2image import convert_from_path
+    with tempfile.TemporaryDirectory() as carpeta:
+        try:
+            rutas = convert_from_path(path_pdf, dpi=dpi, poppler_path=poppler_path or None, thread_count=OCR_WORKERS,
+                                      grayscale=True, output_folder=carpeta, paths_only=True,
+                                      last_page=max_paginas)
+        except Exception as e:
+            logging.error(f"Error al convertir PDF a imágenes ({path_pdf}): {e}")
+            raise
+        for ruta in rutas:
+            imagen = Image.open(ruta)
+            imagen.load()  # lee y suelta el archivo: la carpeta temporal se puede borrar aunque la imagen siga en uso
+            yield imagen, ""
+
+# Fin de la secuencia de páginas en la cola productor/consumidor
+_FIN_PAGINAS = object()
+
+def _producir_paginas(path_pdf, poppler_path, cola, parar, dpi=DPI_RASTER):
+    """Hilo productor: rasteriza páginas y las deja en la cola acotada (bloquea si el OCR va atrasado)."""
+    try:
+        for pagina in _iterar_paginas(path_pdf, poppler_path, dpi):
+            while not parar.is_set():
+                try:
+                    cola.put(pagina, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            if parar.is_set():
+                return
+        cola.put(_FIN_PAGINAS)
+    except Exception as e:
+        cola.put(e)
+
+def paginas_con_texto(path_pdf, poppler_path=None, max_workers=None, dpi=DPI_RASTER):
+    """
+    Genera (numero_pagina, imagen, texto, conf) en orden. Un hilo productor rasteriza mientras se hace
+    el OCR de la tanda anterior; la cola acotada (PAGINAS_EN_COLA) limita las páginas vivas en memoria.
+    Páginas nacidas digitales: el texto embebido (conf 100) si trae al menos TEXTO_NATIVO_MIN caracteres;
+    OCR solo para las páginas escaneadas o con muy poco texto. Cerrar cada imagen es cosa del consumidor.
+    """
+    tam_tanda = max(1, max_workers or OCR_WORKERS)
+    cola = queue.Queue(maxsize=max(PAGINAS_EN_COLA, tam_tanda))
+    parar = threading.Event()
+    productor = threading.Thread(target=_producir_paginas, args=(path_pdf, poppler_path, cola, parar, dpi),
+                                 name="rasterizar_pdf", daemon=True)
+    productor.start()
+    numero = 0
+    try:
+        fin = False
+        while not fin:
+            tanda = []
+            while len(tanda) < tam_tanda:
+                item = cola.get()
+                if item is _FIN_PAGINAS:
+                    fin = True
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                tanda.append(item)
+            if not tanda:
+                break
+            resultados = [(texto, 100.0) for _, texto in tanda]
+            escaneadas = [i for i, (_, texto) in enumerate(tanda) if len(texto) < TEXTO_NATIVO_MIN]
+            if escaneadas:
+                ocr = ocr_paginas([tanda[i][0] for i in escaneadas], max_workers=max_workers)
+                for i, res in zip(escaneadas, ocr):
+                    resultados[i] = res
+            for (img, _), (texto, conf) in zip(tanda, resultados):
+                numero += 1
+                yield numero, img, texto, conf
+    finally:
+        # consumidor terminado (o con error): detener al productor y liberar lo que quede en la cola
+        parar.set()
+        while productor.is_alive() or not cola.empty():
+            try:
+                item = cola.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if isinstance(item, tuple):
+                item[0].close()
+
 # ---------------- MEJORADO: Extracción de información con clasificación robusta ----------------
 def extraer_info_por_pagina(path_pdf, fecha_recepcion_dt, poppler_path=None):
-    images = procesar_pdf_a_paginas(path_pdf, poppler_path=poppler_path)
     resultados = []
     nombre_archivo = os.path.basename(path_pdf)
-    
-    for i, img in enumerate(images, start=1):
-        texto, conf = ocr_image_and_confidence(img)
+    # páginas en flujo: se rasterizan mientras se hace el OCR de las anteriores (todas, la firma necesita la imagen)
+    for i, img, texto, conf in paginas_con_texto(path_pdf, poppler_path=poppler_path):
         
         # USAR CLASIFICACIÓN ROBUSTA con nombre de archivo y contenido
         tipo = clasificar_pagina(nombre_archivo, texto)
@@ -945,9 +1512,7 @@ def extraer_info_por_pagina(path_pdf, fecha_recepcion_dt, poppler_path=None):
         # MEJORADO: Detección de fecha con logging detallado
         fecha_doc = None
         # Detectar si es documento bancario
-        contexto_bancario = any(kw in texto.lower() for kw in 
-                               ["certificacion bancaria", "certificado bancario", "banco", 
-                                "cuenta", "bancaria", "entidad financiera", "certificación bancaria"])
+        contexto_bancario = RE_CONTEXTO_BANCARIO.search(texto.lower()) is not None
         
         if contexto_bancario:
             logging.info(f"Página {i} de {nombre_archivo}: Detectado contexto bancario")
@@ -964,11 +1529,11 @@ def extraer_info_por_pagina(path_pdf, fecha_recepcion_dt, poppler_path=None):
                 logging.debug(f"Fragmento de texto: {texto[:300]}")
         
         firma = detectar_firma_manuscrita(img)
+        img.close()  # la imagen ya no se usa: liberar el buffer de la página
         resultados.append({
             "archivo": nombre_archivo,
             "ruta_archivo": path_pdf,
             "pagina": i,
-            "imagen": img,
             "texto": texto,
             "ocr_conf": conf,
             "tipo_detectado": tipo,
@@ -983,67 +1548,21 @@ def agrupar_paginas_en_documentos(paginas_info):
     if not paginas_info:
         return []
     documentos = []
-    current = None
-    for p in paginas_info:
-        tipo = p.get("tipo_detectado") or "otro"
-        if current is None:
-            current = {
-                "archivo": p["archivo"],
-                "ruta_archivo": p["ruta_archivo"],
-                "paginas": [p["pagina"]],
-                "texto": p["texto"] or "",
-                "ocr_confs": [p.get("ocr_conf") or 0.0],
-                "tipo_detectado": tipo,
-                "nit_o_cedula": p.get("nit_o_cedula"),
-                "fecha_documento": p.get("fecha_documento"),
-                "firma_manuscrita": bool(p.get("firma_manuscrita")),
-            }
-            continue
-        if tipo == current["tipo_detectado"]:
-            current["paginas"].append(p["pagina"])
-            current["texto"] += "\n\n" + (p.get("texto") or "")
-            current["ocr_confs"].append(p.get("ocr_conf") or 0.0)
-            if not current["nit_o_cedula"] and p.get("nit_o_cedula"):
-                current["nit_o_cedula"] = p.get("nit_o_cedula")
-            if not current["fecha_documento"] and p.get("fecha_documento"):
-                current["fecha_documento"] = p.get("fecha_documento")
-            current["firma_manuscrita"] = current["firma_manuscrita"] or bool(p.get("firma_manuscrita"))
-        else:
-            avg_conf = float(np.mean(current["ocr_confs"])) if current["ocr_confs"] else 0.0
-            documentos.append({
-                "archivo": current["archivo"],
-                "ruta_archivo": current["ruta_archivo"],
-                "paginas": current["paginas"],
-                "texto": current["texto"],
-                "ocr_conf": avg_conf,
-                "tipo_detectado": current["tipo_detectado"],
-                "nit_o_cedula": current["nit_o_cedula"],
-                "fecha_documento": current["fecha_documento"],
-                "firma_manuscrita": current["firma_manuscrita"]
-            })
-            current = {
-                "archivo": p["archivo"],
-                "ruta_archivo": p["ruta_archivo"],
-                "paginas": [p["pagina"]],
-                "texto": p["texto"] or "",
-                "ocr_confs": [p.get("ocr_conf") or 0.0],
-                "tipo_detectado": tipo,
-                "nit_o_cedula": p.get("nit_o_cedula"),
-                "fecha_documento": p.get("fecha_documento"),
-                "firma_manuscrita": bool(p.get("firma_manuscrita")),
-            }
-    if current:
-        avg_conf = float(np.mean(current["ocr_confs"])) if current["ocr_confs"] else 0.0
+    # Páginas contiguas con el mismo tipo forman un documento; el texto se une una sola vez por grupo
+    for tipo, grupo in itertools.groupby(paginas_info, key=lambda p: p.get("tipo_detectado") or "otro"):
+        grupo = list(grupo)
+        primera = grupo[0]
         documentos.append({
-            "archivo": current["archivo"],
-            "ruta_archivo": current["ruta_archivo"],
-            "paginas": current["paginas"],
-            "texto": current["texto"],
-            "ocr_conf": avg_conf,
-            "tipo_detectado": current["tipo_detectado"],
-            "nit_o_cedula": current["nit_o_cedula"],
-            "fecha_documento": current["fecha_documento"],
-            "firma_manuscrita": current["firma_manuscrita"]
+            "archivo": primera["archivo"],
+            "ruta_archivo": primera["ruta_archivo"],
+            "paginas": [p["pagina"] for p in grupo],
+            "texto": "\n\n".join(p.get("texto") or "" for p in grupo),
+            "ocr_conf": float(np.mean([p.get("ocr_conf") or 0.0 for p in grupo])),
+            "tipo_detectado": tipo,
+            # primer valor no vacío del grupo (o el de la primera página)
+            "nit_o_cedula": next((p["nit_o_cedula"] for p in grupo if p.get("nit_o_cedula")), primera.get("nit_o_cedula")),
+            "fecha_documento": next((p["fecha_documento"] for p in grupo if p.get("fecha_documento")), primera.get("fecha_documento")),
+            "firma_manuscrita": any(bool(p.get("firma_manuscrita")) for p in grupo)
         })
     return documentos
 
@@ -1059,8 +1578,61 @@ def clasificar_texto_keywords_old(texto: str):
     return best[0] if best[1] > 0 else "otro"
 
 # ---------------- CORREGIDO: Evaluar item con manejo completo de tipos de fecha ----------------
+# Keywords de cada ítem del checklist en minúsculas, calculadas una vez: {item_id: (keyword, ...)}
+_KW_ITEM_LOWER = {
+    item["id"]: tuple(sys.intern(kw.lower()) for kw in item.get("keywords", []))
+    for items in CHECKLIST.values() for item in items
+}
+# Un buscador por ítem: todas sus keywords en una sola pasada por el texto del documento
+_BUSCAR_KW_ITEM = {item_id: crear_buscador_patrones(kws) for item_id, kws in _KW_ITEM_LOWER.items()}
+# Buscador con las keywords de todos los ítems: una pasada por documento sirve para todo el checklist
+_BUSCAR_KW_ITEMS = crear_buscador_patrones(kw for kws in _KW_ITEM_LOWER.values() for kw in kws)
+
+def _keywords_por_documento(documentos_detectados):
+    """Keywords de ítems presentes en cada documento (misma posición que documentos_detectados)."""
+    return [_BUSCAR_KW_ITEMS((doc.get("texto") or "").lower()) for doc in documentos_detectados]
+
+# Ítems cuyo estado depende además de la firma manuscrita (se revisan todos sus documentos)
+_ITEMS_CON_FIRMA = frozenset(("carta_representante", "carta_peticionario", "cert_contador"))
+
+# CORRECCIÓN: Funciones auxiliares para manejar tipos de fecha (a nivel de módulo y con caché)
+@functools.lru_cache(maxsize=2048)
+def _parse_fecha_cached(texto):
+    """Texto -> date. ISO (como se guarda la fecha redetectada) primero; si no, dateutil con día primero."""
+    try:
+        return date.fromisoformat(texto)
+    except ValueError:
+        pass
+    try:
+        parsed = parse_date(texto, dayfirst=True)
+        return parsed.date() if hasattr(parsed, 'date') else parsed
+    except Exception:
+        return None
+
+def obtener_fecha_date(fecha_obj):
+    """Convierte cualquier tipo de fecha a datetime.date de manera segura"""
+    if fecha_obj is None:
+        return None
+    # Si es datetime, extraer la parte date (datetime es subclase de date: va primero)
+    if isinstance(fecha_obj, datetime):
+        return fecha_obj.date()
+    # Si ya es date, devolver directamente
+    if isinstance(fecha_obj, date):
+        return fecha_obj
+    # Si es string, intentar parsear (memoizado: se repite entre ítems y documentos)
+    if isinstance(fecha_obj, str):
+        return _parse_fecha_cached(fecha_obj)
+    return None
+
+@functools.lru_cache(maxsize=1024)
+def _limite_vigencia(fecha_doc, dias_habiles):
+    """FECHA LÍMITE = fecha de expedición + días hábiles (memoizada por fecha y vigencia)."""
+    return fecha_limite_habiles(datetime.combine(fecha_doc, datetime.min.time()), dias_habiles).date()
+
 # ---------------- CORREGIDO: Evaluar item con manejo completo de tipos de fecha ----------------
-def evaluar_item(item, documentos_detectados, fecha_recepcion_dt, peticionario_tipo="persona_juridica", archivo_inferido=None):
+def evaluar_item(item, documentos_detectados, fecha_recepcion_dt, peticionario_tipo="persona_juridica", archivo_inferido=None,
+                 keywords_docs=None):
+    # keywords_docs: resultado de _keywords_por_documento, calculado una vez para todos los ítems
     archivos = []
     observaciones = []
     estado = "Falta"
@@ -1077,36 +1649,23 @@ def evaluar_item(item, documentos_detectados, fecha_recepcion_dt, peticionario_t
     if item.get("id") == "acta_consorcial" and peticionario_tipo != "consorcio":
         return "N/A", None, "Aplica solo si peticionario es consorcio/unión temporal"
 
-    # CORRECCIÓN: Función auxiliar simplificada para manejar tipos de fecha
-    def obtener_fecha_date(fecha_obj):
-        """Convierte cualquier tipo de fecha a datetime.date de manera segura"""
-        if fecha_obj is None:
-            return None
-        
-        # Si ya es date, devolver directamente
-        if type(fecha_obj).__name__ == 'date':
-            return fecha_obj
-        
-        # Si es datetime, extraer la parte date
-        if type(fecha_obj).__name__ == 'datetime':
-            return fecha_obj.date()
-        
-        # Si es string, intentar parsear
-        if isinstance(fecha_obj, str):
-            try:
-                parsed = parse_date(fecha_obj, dayfirst=True)
-                return parsed.date() if hasattr(parsed, 'date') else parsed
-            except:
-                return None
-        
-        return None
+    # La fecha de recepción es la misma para todos los documentos: convertirla una vez
+    fecha_recepcion_date = obtener_fecha_date(fecha_recepcion_dt)
 
-    for doc in documentos_detectados:
-        texto = (doc.get("texto") or "").lower()
-        score = 0
-        for kw in item.get("keywords", []):
-            if kw.lower() in texto:
-                score += 1
+    keywords_item = _KW_ITEM_LOWER.get(item.get("id"))
+    buscar_kw = _BUSCAR_KW_ITEM.get(item.get("id"))
+    if keywords_item is None:
+        keywords_item = tuple(kw.lower() for kw in item.get("keywords", []))
+        buscar_kw = crear_buscador_patrones(keywords_item)
+        keywords_docs = None  # ítem fuera de CHECKLIST: sus keywords no están en el buscador global
+
+    for i, doc in enumerate(documentos_detectados):
+        # keywords repetidas en el ítem suman una vez cada una, como en el conteo original
+        if keywords_docs is not None:
+            presentes = keywords_docs[i]
+        else:
+            presentes = buscar_kw((doc.get("texto") or "").lower())
+        score = sum(1 for kw in keywords_item if kw in presentes)
         
         # Si el ítem fue inferido por nombre de archivo, ser más permisivo
         es_inferido = archivo_inferido and item["id"] in archivo_inferido
@@ -1141,21 +1700,12 @@ def evaluar_item(item, documentos_detectados, fecha_recepcion_dt, peticionario_t
                 # Validar vigencia si tenemos fecha
                 if fecha_doc:
                     try:
-                        # CORRECCIÓN: Manejo consistente de todas las fechas
-                        fecha_recepcion_date = obtener_fecha_date(fecha_recepcion_dt)
-                        
                         if fecha_recepcion_date is None:
                             estado = "Revisión"
                             observaciones.append("No se pudo determinar la fecha de recepción")
                         else:
-                            # Convertir fecha_doc a datetime para fecha_limite_habiles
-                            if hasattr(fecha_doc, 'date'):
-                                fecha_doc_datetime = datetime.combine(fecha_doc, datetime.min.time())
-                            else:
-                                fecha_doc_datetime = datetime.combine(fecha_doc, datetime.min.time())
-                            
                             # FECHA LÍMITE = fecha de expedición + días hábiles
-                            fecha_limite_validez = fecha_limite_habiles(fecha_doc_datetime, vig).date()
+                            fecha_limite_validez = _limite_vigencia(fecha_doc, vig)
                             
                             # LÓGICA CORREGIDA: La fecha de recepción debe ser <= fecha límite
                             if fecha_recepcion_date <= fecha_limite_validez:
@@ -1179,7 +1729,7 @@ def evaluar_item(item, documentos_detectados, fecha_recepcion_dt, peticionario_t
                 estado = "Revisión"
                 observaciones.append(f"OCR baja/confianza={conf:.1f}")
 
-            if item["id"] in ("carta_representante","carta_peticionario","cert_contador","cert_contador"):
+            if item["id"] in _ITEMS_CON_FIRMA:
                 if not doc.get("firma_manuscrita"):
                     observaciones.append("Firma manuscrita no detectada; verificar firma digital o firma escaneada")
                     if estado == "C":
@@ -1193,17 +1743,15 @@ def evaluar_item(item, documentos_detectados, fecha_recepcion_dt, peticionario_t
     return estado, archivos if archivos else None, "; ".join(observaciones) if observaciones else None
 
 # ---------------- generar_checklist (con allowed_item_ids) ----------------
-def generar_checklist(documentos_detectados, tipo_devolucion, fecha_recepcion_str, peticionario_tipo="persona_juridica", allowed_item_ids=None):
+def generar_filas_checklist(documentos_detectados, tipo_devolucion, fecha_recepcion_str, peticionario_tipo="persona_juridica", allowed_item_ids=None):
+    """Filas del checklist como lista de dicts (el lote arma un único DataFrame al final)."""
     # CORRECCIÓN: Manejo robusto de la fecha de recepción
-    try:
-        if isinstance(fecha_recepcion_str, (datetime, datetime.date)):
-            fecha_recepcion_dt = fecha_recepcion_str
-        else:
-            fecha_recepcion_dt = parse_date(fecha_recepcion_str, dayfirst=True)
-    except Exception as e:
-        logging.error(f"Error parseando fecha de recepción '{fecha_recepcion_str}': {e}")
+    # (se convierte una sola vez a date; evaluar_item la recibe ya resuelta)
+    fecha_recepcion_dt = obtener_fecha_date(fecha_recepcion_str)
+    if fecha_recepcion_dt is None:
+        logging.error(f"Error parseando fecha de recepción '{fecha_recepcion_str}'")
         # Usar fecha actual como fallback
-        fecha_recepcion_dt = datetime.now()
+        fecha_recepcion_dt = datetime.now().date()
     
     todos_items = CHECKLIST["misional"] if tipo_devolucion == "misional" else CHECKLIST["no_misional"]
 
@@ -1212,11 +1760,15 @@ def generar_checklist(documentos_detectados, tipo_devolucion, fecha_recepcion_st
     else:
         items = todos_items
 
+    # Texto de cada documento en minúsculas y recorrido una sola vez, no una por ítem
+    keywords_docs = _keywords_por_documento(documentos_detectados)
+
     filas = []
     for item in items:
         estado, archivos, obs = evaluar_item(item, documentos_detectados, fecha_recepcion_dt, 
                                             peticionario_tipo=peticionario_tipo,
-                                            archivo_inferido=allowed_item_ids)
+                                            archivo_inferido=allowed_item_ids,
+                                            keywords_docs=keywords_docs)
         filas.append({
             "TipoDevolucion": tipo_devolucion,
             "PeticionarioTipo": peticionario_tipo,
@@ -1227,13 +1779,77 @@ def generar_checklist(documentos_detectados, tipo_devolucion, fecha_recepcion_st
             "ArchivosFuente": ", ".join(archivos) if archivos else None,
             "Observaciones": obs
         })
-    
-    return pd.DataFrame(filas)
+    return filas
+
+def generar_checklist(documentos_detectados, tipo_devolucion, fecha_recepcion_str, peticionario_tipo="persona_juridica", allowed_item_ids=None):
+    import pandas as pd
+    return pd.DataFrame(generar_filas_checklist(documentos_detectados, tipo_devolucion, fecha_recepcion_str,
+                                                peticionario_tipo, allowed_item_ids=allowed_item_ids))
 
 # ---------------- procesamiento batch de carpeta (CLI) ----------------
-def procesar_carpeta(folder_path, fecha_recepcion_str, tipo_devolucion, peticionario_tipo="persona_juridica", poppler_path=None, tesseract_cmd=None, out_excel="informe_devoluciones.xlsx", template_misional=TEMPLATE_MISIONAL, template_no_misional=TEMPLATE_NO_MISIONAL):
+def _process_one_pdf(fname, folder_path, fecha_recepcion_str, tipo_devolucion, peticionario_tipo, poppler_path):
+    """
+    Procesa un PDF (una solicitud) de forma independiente: OCR, agrupación, inferencia y checklist.
+    Función de nivel de módulo para poder ejecutarse en un ProcessPoolExecutor.
+    Devuelve (filas_check, fila_resumen): filas como dicts (sin DataFrame por archivo, y más baratas de
+    devolver desde el proceso); fila_resumen es None si hubo error.
+    """
+    full_path = os.path.join(folder_path, fname)
+    logging.info(f"Procesando: {fname} ...")
+    try:
+        paginas_info = extraer_info_por_pagina(full_path, parse_date(fecha_recepcion_str, dayfirst=True), poppler_path=poppler_path)
+        documentos = agrupar_paginas_en_documentos(paginas_info)
+
+        # inferir items desde nombre (ahora: búsqueda directa de frases/substring)
+        allowed_ids = inferir_items_desde_nombre(fname, tipo_devolucion)
+        if allowed_ids:
+            logging.info(f"Inferencia desde nombre: {fname} -> items {allowed_ids}")
+            filas_check = generar_filas_checklist(documentos, tipo_devolucion, fecha_recepcion_str, peticionario_tipo, allowed_item_ids=allowed_ids)
+        else:
+            logging.info(f"No se infirió item específico para {fname} -> evaluando todos los ítems")
+            filas_check = generar_filas_checklist(documentos, tipo_devolucion, fecha_recepcion_str, peticionario_tipo)
+
+        inferidos = ",".join(allowed_ids) if allowed_ids else None
+        for fila in filas_check:
+            fila["SolicitudArchivo"] = fname
+            fila["NombreArchivo"] = fname
+            fila["InferredItemIDs"] = inferidos
+
+        return filas_check, {
+            "archivo": fname,
+            "paginas_detectadas": len(paginas_info),
+            "documentos_detectados": len(documentos),
+            "hash_sha256": sha256_file(full_path)
+        }
+    except Exception as e:
+        logging.exception(f"ERROR procesando {fname}: {e}")
+        return [{
+            "TipoDevolucion": tipo_devolucion,
+            "PeticionarioTipo": peticionario_tipo,
+            "ItemID": "ERROR",
+            "Item": f"ERROR al procesar {fname}",
+            "Requerido": True,
+            "Estado": "ERROR",
+            "ArchivosFuente": fname,
+            "Observaciones": str(e),
+            "SolicitudArchivo": fname,
+            "NombreArchivo": fname,
+            "InferredItemIDs": None
+        }], None
+
+def _init_worker_pdf(tesseract_cmd, ocr_workers, log_level):
+    """Inicializador de cada proceso del pool: Tesseract, hilos de OCR por proceso y nivel de logging."""
+    global OCR_WORKERS
+    if tesseract_cmd:
+        configurar_tesseract(tesseract_cmd)
+    OCR_WORKERS = ocr_workers
+    logging.getLogger().setLevel(log_level)
+
+def procesar_carpeta(folder_path, fecha_recepcion_str, tipo_devolucion, peticionario_tipo="persona_juridica", poppler_path=None, tesseract_cmd=None, out_excel="informe_devoluciones.xlsx", template_misional=TEMPLATE_MISIONAL, template_no_misional=TEMPLATE_NO_MISIONAL, max_workers=None):
+    import pandas as pd
+
     if tesseract_cmd:
-        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        configurar_tesseract(tesseract_cmd)
 
     todas_las_filas = []
     resumen_archivos = []
@@ -1242,57 +1858,36 @@ def procesar_carpeta(folder_path, fecha_recepcion_str, tipo_devolucion, peticion
         logging.info("No hay PDFs en la carpeta indicada.")
         return None
 
-    for fname in pdf_files:
-        full_path = os.path.join(folder_path, fname)
-        logging.info(f"Procesando: {fname} ...")
+    # Un proceso por PDF (hasta max_workers); los núcleos se reparten entre procesos e hilos de OCR.
+    # Los resultados se recogen en el orden de pdf_files y los Excel se escriben solo en este proceso.
+    args_pdf = (folder_path, fecha_recepcion_str, tipo_devolucion, peticionario_tipo, poppler_path)
+    n_procesos = min(max_workers or os.cpu_count() or 1, len(pdf_files))
+    resultados = None
+    if n_procesos > 1:
         try:
-            paginas_info = extraer_info_por_pagina(full_path, parse_date(fecha_recepcion_str, dayfirst=True), poppler_path=poppler_path)
-            documentos = agrupar_paginas_en_documentos(paginas_info)
-
-            # inferir items desde nombre (ahora: búsqueda directa de frases/substring)
-            allowed_ids = inferir_items_desde_nombre(fname, tipo_devolucion)
-            if allowed_ids:
-                logging.info(f"Inferencia desde nombre: {fname} -> items {allowed_ids}")
-                df_check = generar_checklist(documentos, tipo_devolucion, fecha_recepcion_str, peticionario_tipo, allowed_item_ids=allowed_ids)
-            else:
-                logging.info(f"No se infirió item específico para {fname} -> evaluando todos los ítems")
-                df_check = generar_checklist(documentos, tipo_devolucion, fecha_recepcion_str, peticionario_tipo)
-
-            df_check["SolicitudArchivo"] = fname
-            df_check["NombreArchivo"] = fname
-            df_check["InferredItemIDs"] = ",".join(allowed_ids) if allowed_ids else None
-
-            todas_las_filas.append(df_check)
-            resumen_archivos.append({
-                "archivo": fname,
-                "paginas_detectadas": len(paginas_info),
-                "documentos_detectados": len(documentos),
-                "hash_sha256": sha256_file(full_path)
-            })
+            with ProcessPoolExecutor(max_workers=n_procesos, initializer=_init_worker_pdf,
+                                     initargs=(tesseract_cmd, max(1, OCR_WORKERS // n_procesos),
+                                               logging.getLogger().level)) as ex:
+                futuros = [ex.submit(_process_one_pdf, fname, *args_pdf) for fname in pdf_files]
+                resultados = [f.result() for f in futuros]
         except Exception as e:
-            logging.exception(f"ERROR procesando {fname}: {e}")
-            todas_las_filas.append(pd.DataFrame([{
-                "TipoDevolucion": tipo_devolucion,
-                "PeticionarioTipo": peticionario_tipo,
-                "ItemID": "ERROR",
-                "Item": f"ERROR al procesar {fname}",
-                "Requerido": True,
-                "Estado": "ERROR",
-                "ArchivosFuente": fname,
-                "Observaciones": str(e),
-                "SolicitudArchivo": fname,
-                "NombreArchivo": fname,
-                "InferredItemIDs": None
-            }]))
-
-    if todas_las_filas:
-        df_total = pd.concat(todas_las_filas, ignore_index=True)
-    else:
-        df_total = pd.DataFrame()
+            logging.warning(f"No se pudo procesar en paralelo, se procesa secuencialmente: {e}")
+            resultados = None
+    if resultados is None:
+        resultados = [_process_one_pdf(fname, *args_pdf) for fname in pdf_files]
+
+    for filas_check, fila_resumen in resultados:
+        todas_las_filas.extend(filas_check)
+        if fila_resumen is not None:
+            resumen_archivos.append(fila_resumen)
+
+    # Un único DataFrame para todo el lote (sin DataFrame intermedio por archivo ni concat)
+    df_total = pd.DataFrame(todas_las_filas)
     df_resumen = pd.DataFrame(resumen_archivos)
 
     # Guardar auditoría como antes
-    with pd.ExcelWriter(out_excel, engine="openpyxl") as writer:
+    # (sin constant_memory: pandas escribe por columnas y ese modo descarta las filas ya volcadas)
+    with pd.ExcelWriter(out_excel, engine=EXCEL_ENGINE_INFORME) as writer:
         df_total.to_excel(writer, sheet_name="Checklist", index=False)
         df_resumen.to_excel(writer, sheet_name="ResumenArchivos", index=False)
     logging.info(f"Proceso terminado. Informe generado: {out_excel}")
@@ -1322,10 +1917,74 @@ def procesar_carpeta(folder_path, fecha_recepcion_str, tipo_devolucion, peticion
     return out_excel
 
 # ---------------- Streamlit UI (con agrupamiento e inferencia robusta) ----------------
+# PDFs subidos que se procesan a la vez en segundo plano (cada uno reparte además su OCR en hilos)
+STREAMLIT_ARCHIVOS_PARALELO = min(4, os.cpu_count() or 1)
+
+def _ocr_pdf_subido(tmp_path, poppler_path=None, ocr_workers=None, dpi=DPI_RASTER):
+    """
+    OCR de un PDF subido en la UI: lista de (texto, conf, firma_manuscrita) por página. Corre en un hilo
+    del pool de fondo, así que no llama a streamlit. Solo depende del contenido del PDF (y del DPI),
+    por eso la UI lo guarda por hash y no repite el OCR de archivos ya vistos.
+    """
+    paginas = []
+    for _, img, texto, conf in paginas_con_texto(tmp_path, poppler_path=poppler_path, max_workers=ocr_workers, dpi=dpi):
+        paginas.append((texto, conf, detectar_firma_manuscrita(img)))
+        img.close()
+    return paginas
+
+def _analizar_pdf_subido(nombre, tmp_path, paginas_ocr):
+    """Extracción por página (tipo, NIT/cédula, fecha) a partir del OCR ya hecho; devuelve paginas_info."""
+    paginas_info = []
+    for i, (texto, conf, firma) in enumerate(paginas_ocr, start=1):
+        # USAR CLASIFICACIÓN ROBUSTA en Streamlit
+        tipo = clasificar_pagina(nombre, texto)
+        nit = None
+        m = RE_NIT.search(texto)
+        if m:
+            nit = m.group(1)
+        else:
+            m2 = RE_CEDULA.search(texto)
+            if m2:
+                nit = m2.group(1)
+
+        # MEJORADO: Detección de fecha en Streamlit
+        fecha_doc = None
+        contexto_bancario = RE_CONTEXTO_BANCARIO.search(texto.lower()) is not None
+        fecha_doc = extraer_fecha_mejorada(texto, contexto_bancario=contexto_bancario)
+
+        if not fecha_doc:
+            # respaldo: la primera coincidencia completa de RE_DATE (ISO primero, si no día primero)
+            md = RE_DATE.search(texto)
+            if md:
+                fecha_doc = _parse_fecha_cached(md.group(0))
+
+        paginas_info.append({
+            "archivo": nombre,
+            "ruta_archivo": tmp_path,
+            "pagina": i,
+            "texto": texto,
+            "ocr_conf": conf,
+            "tipo_detectado": tipo,
+            "nit_o_cedula": nit,
+            "fecha_documento": fecha_doc.isoformat() if fecha_doc else None,
+            "firma_manuscrita": firma
+        })
+    return paginas_info
+
+def _crear_pool_streamlit(tesseract_cmd=None):
+    """Pool de fondo de la UI; run_streamlit_app lo envuelve en st.cache_resource para reutilizarlo entre reruns."""
+    if tesseract_cmd:
+        configurar_tesseract(tesseract_cmd)
+    return ThreadPoolExecutor(max_workers=STREAMLIT_ARCHIVOS_PARALELO, thread_name_prefix="pdf_ui")
+
 def run_streamlit_app(default_poppler=POPPLER_PATH, default_tesseract=TESSERACT_CMD):
     if not STREAMLIT_AVAILABLE:
         print("Streamlit no está instalado. Instala streamlit para usar la interfaz: pip install streamlit")
         return
+    import streamlit as st
+    import pandas as pd
+
+    _pool_streamlit = st.cache_resource(show_spinner=False)(_crear_pool_streamlit)
 
     st.set_page_config(page_title="Procesador Devoluciones SENA", layout="wide")
     st.title("Procesador Automático — Lista de Chequeo Devoluciones SENA (UI)")
@@ -1338,6 +1997,9 @@ def run_streamlit_app(default_poppler=POPPLER_PATH, default_tesseract=TESSERACT_
         pet_tipo = st.selectbox("Tipo de peticionario", options=["persona_juridica","persona_natural","consorcio"])
         poppler_in = st.text_input("Ruta a poppler (si Windows)", value=default_poppler or "")
         tesseract_in = st.text_input("Ruta Tesseract (si necesario)", value=default_tesseract or "")
+        alta_calidad = st.checkbox(f"OCR alta calidad ({DPI_RASTER} DPI, más lento)", value=False,
+                                   help=f"Por defecto las páginas se rasterizan a {DPI_RAPIDO} DPI")
+        dpi = DPI_RASTER if alta_calidad else DPI_RAPIDO
 
     st.info("Arrastra y suelta uno o varios archivos PDF. Cada PDF = 1 solicitud.")
     uploaded = st.file_uploader("Sube archivos PDF", type="pdf", accept_multiple_files=True)
@@ -1346,74 +2008,69 @@ def run_streamlit_app(default_poppler=POPPLER_PATH, default_tesseract=TESSERACT_
         st.write(f"{len(uploaded)} archivo(s) cargado(s).")
         resultados_check_total = []
         resumen_archivos = []
+
+        # 1) Volcar cada PDF subido a un archivo temporal (y calcular su hash) en el hilo de la UI
+        subidos = []  # (uf, tmp_path, hash_pdf)
         for uf in uploaded:
+            try:
+                # copia por bloques de 1 MiB (sin un bytes con el PDF entero) y hash en la misma pasada
+                h = hashlib.sha256()
+                uf.seek(0)
+                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+                    for bloque in iter(functools.partial(uf.read, 1 << 20), b""):
+                        h.update(bloque)
+                        tmp.write(bloque)
+                subidos.append((uf, tmp.name, h.hexdigest()))
+            except Exception as e:
+                st.error(f"Error procesando {uf.name}: {e}")
+                logging.exception(f"Error procesando {uf.name}: {e}")
+
+        # 2) OCR en el pool de fondo (varios archivos a la vez), con barra de progreso. El OCR se guarda en la
+        # sesión por (hash, dpi): cada rerun de Streamlit y los PDFs repetidos (mismo contenido con otro nombre)
+        # no se vuelven a procesar. Los hilos de OCR por página se reparten entre los archivos simultáneos.
+        ocr_por_hash = st.session_state.setdefault("ocr_por_hash", {})
+        pendientes = {}  # (hash, dpi) -> ruta temporal del primer PDF subido con ese contenido
+        for uf, tmp_path, hash_pdf in subidos:
+            if (hash_pdf, dpi) not in ocr_por_hash:
+                pendientes.setdefault((hash_pdf, dpi), tmp_path)
+        errores_ocr = {}
+        if pendientes:
+            pool = _pool_streamlit(tesseract_in or None)
+            ocr_por_archivo = max(1, OCR_WORKERS // min(len(pendientes), STREAMLIT_ARCHIVOS_PARALELO))
+            futuros = {
+                pool.submit(_ocr_pdf_subido, tmp_path, poppler_in or None, ocr_por_archivo, dpi): clave
+                for clave, tmp_path in pendientes.items()
+            }
+            barra = st.progress(0.0, text="Procesando PDFs (OCR)...")
+            for hechos, fut in enumerate(as_completed(futuros), start=1):
+                try:
+                    ocr_por_hash[futuros[fut]] = fut.result()
+                except Exception as e:
+                    errores_ocr[futuros[fut]] = e
+                barra.progress(hechos / len(futuros), text=f"{hechos}/{len(futuros)} archivo(s) procesado(s)")
+        if len(pendientes) < len(subidos):
+            st.caption(f"{len(subidos) - len(pendientes)} archivo(s) reutilizan un OCR ya hecho (mismo contenido).")
+
+        # 3) Mostrar los resultados en el orden de subida
+        for uf, tmp_path, hash_pdf in subidos:
             st.write("---")
             st.subheader(f"Archivo: {uf.name}")
             try:
-                tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-                tmp.write(uf.read())
-                tmp.flush()
-                tmp.close()
-                tmp_path = tmp.name
-
-                images = convert_from_path(tmp_path, dpi=200, poppler_path=poppler_in or None) if (poppler_in or default_poppler) else convert_from_path(tmp_path, dpi=200)
-                st.write(f"Páginas detectadas: {len(images)}")
+                if (hash_pdf, dpi) in errores_ocr:
+                    raise errores_ocr[(hash_pdf, dpi)]
+                paginas_info = _analizar_pdf_subido(uf.name, tmp_path, ocr_por_hash[(hash_pdf, dpi)])
+                st.write(f"Páginas detectadas: {len(paginas_info)}")
 
                 if st.checkbox(f"Ver vista previa OCR de {uf.name}", key=f"vp_{uf.name}"):
+                    # el texto ya está calculado: solo se rasterizan de nuevo las páginas a mostrar
                     col1, col2 = st.columns(2)
-                    for i, img in enumerate(images[:6], start=1):
-                        texto, conf = ocr_image_and_confidence(img)
-                        with col1:
-                            st.image(img, caption=f"{uf.name} - p{i}", use_column_width=True)
-                        with col2:
-                            st.text_area(f"Texto p{i} (conf={conf:.1f})", value=texto[:2000], height=200)
-
-                paginas_info = []
-                for i, img in enumerate(images, start=1):
-                    texto, conf = ocr_image_and_confidence(img)
-                    # USAR CLASIFICACIÓN ROBUSTA en Streamlit
-                    tipo = clasificar_pagina(uf.name, texto)
-                    nit = None
-                    m = RE_NIT.search(texto)
-                    if m:
-                        nit = m.group(1)
-                    else:
-                        m2 = RE_CEDULA.search(texto)
-                        if m2:
-                            nit = m2.group(1)
-                    
-                    # MEJORADO: Detección de fecha en Streamlit
-                    fecha_doc = None
-                    contexto_bancario = any(kw in texto.lower() for kw in ["certificacion bancaria", "certificado bancario", "banco", "cuenta", "bancaria", "entidad financiera"])
-                    fecha_doc = extraer_fecha_mejorada(texto, contexto_bancario=contexto_bancario)
-                    
-                    if not fecha_doc:
-                        md = RE_DATE.search(texto)
-                        if md:
-                            try:
-                                for group_num in range(1, 12):
-                                    if md.group(group_num):
-                                        try:
-                                            fecha_doc = parse_date(md.group(group_num), dayfirst=True).date()
-                                            break
-                                        except:
-                                            continue
-                            except:
-                                fecha_doc = None
-                    
-                    firma = detectar_firma_manuscrita(img)
-                    paginas_info.append({
-                        "archivo": uf.name,
-                        "ruta_archivo": tmp_path,
-                        "pagina": i,
-                        "imagen": img,
-                        "texto": texto,
-                        "ocr_conf": conf,
-                        "tipo_detectado": tipo,
-                        "nit_o_cedula": nit,
-                        "fecha_documento": fecha_doc.isoformat() if fecha_doc else None,
-                        "firma_manuscrita": firma
-                    })
+                    # closing: el generador suelta el PDF (y la carpeta de poppler) antes de borrar el temporal
+                    with contextlib.closing(_iterar_paginas(tmp_path, poppler_in or None, dpi, max_paginas=6)) as paginas_vista:
+                        for i, ((img, _), pag) in enumerate(zip(paginas_vista, paginas_info), start=1):
+                            with col1:
+                                st.image(img, caption=f"{uf.name} - p{i}", use_column_width=True)
+                            with col2:
+                                st.text_area(f"Texto p{i} (conf={pag['ocr_conf']:.1f})", value=pag["texto"][:2000], height=200)
 
                 documentos = agrupar_paginas_en_documentos(paginas_info)
                 st.write(f"Documentos detectados (grupos de páginas contiguas): {len(documentos)}")
@@ -1446,21 +2103,23 @@ def run_streamlit_app(default_poppler=POPPLER_PATH, default_tesseract=TESSERACT_
                 df_check["InferredItemIDs"] = ",".join(allowed_ids) if allowed_ids else None
 
                 resultados_check_total.append(df_check)
-                resumen_archivos.append({"archivo": uf.name, "paginas": len(images), "documentos_detectados": len(documentos), "sha256": sha256_file(tmp_path)})
-                try:
-                    os.remove(tmp_path)
-                except:
-                    pass
+                resumen_archivos.append({"archivo": uf.name, "paginas": len(paginas_info), "documentos_detectados": len(documentos), "sha256": hash_pdf})
 
             except Exception as e:
                 st.error(f"Error procesando {uf.name}: {e}")
                 logging.exception(f"Error procesando {uf.name}: {e}")
+            finally:
+                try:
+                    os.remove(tmp_path)
+                except OSError as e:
+                    logging.warning(f"No se pudo borrar el temporal {tmp_path}: {e}")
 
         if resultados_check_total:
             df_total = pd.concat(resultados_check_total, ignore_index=True)
             df_resumen = pd.DataFrame(resumen_archivos)
             towrite = io.BytesIO()
-            with pd.ExcelWriter(towrite, engine="openpyxl") as writer:
+            # mismo motor que el informe del CLI (sin constant_memory: pandas escribe por columnas)
+            with pd.ExcelWriter(towrite, engine=EXCEL_ENGINE_INFORME) as writer:
                 df_total.to_excel(writer, sheet_name="Checklist", index=False)
                 df_resumen.to_excel(writer, sheet_name="ResumenArchivos", index=False)
             towrite.seek(0)
@@ -1484,6 +2143,7 @@ def main_cli():
     parser.add_argument("--out", default="informe_devoluciones.xlsx", help="Archivo Excel de salida")
     parser.add_argument("--template_misional", default=TEMPLATE_MISIONAL, help="Plantilla Excel misional (opcional)")
     parser.add_argument("--template_no_misional", default=TEMPLATE_NO_MISIONAL, help="Plantilla Excel no_misional (opcional)")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos en paralelo (uno por PDF). Por defecto: núcleos disponibles")
     parser.add_argument("--debug", action="store_true", help="Activar modo debug con logging detallado")
     args = parser.parse_args()
 
@@ -1492,6 +2152,8 @@ def main_cli():
         logging.getLogger().setLevel(logging.DEBUG)
         logging.info("Modo DEBUG activado - se mostrarán todos los detalles de detección de fechas")
 
+    verificar_tesseract_y_idioma("spa")
+
     poppler_path = args.poppler or POPPLER_PATH
     tesseract_cmd = args.tesseract or TESSERACT_CMD
 
@@ -1499,11 +2161,15 @@ def main_cli():
                      peticionario_tipo=args.peticionario, poppler_path=poppler_path,
                      tesseract_cmd=tesseract_cmd, out_excel=args.out,
                      template_misional=args.template_misional,
-                     template_no_misional=args.template_no_misional)
+                     template_no_misional=args.template_no_misional,
+                     max_workers=args.workers)
 
 if __name__ == "__main__":
     # Si streamlit está disponible y el script se invoca sin args preferimos UI para compatibilidad
     if STREAMLIT_AVAILABLE and (len(sys.argv) == 1 or "streamlit" in sys.argv[0].lower()):
+        # Streamlit re-ejecuta el script en cada interacción: cache_resource conserva el resultado entre reruns
+        import streamlit as st
+        st.cache_resource(show_spinner=False)(verificar_tesseract_y_idioma)("spa")
         run_streamlit_app(default_poppler=POPPLER_PATH, default_tesseract=TESSERACT_CMD)
     else:
         main_cli()
\ No newline at end of file
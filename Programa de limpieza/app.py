@@ -9,51 +9,110 @@ from pathlib import Path
 from datetime import datetime, time, timezone
 import re
 import copy
+import itertools
 import shutil
+import zipfile
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import traceback
 import gc
+import atexit
+import importlib.util
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache, wraps
 
 # Configuración de logging
 LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
 log_filename = os.path.join(LOG_DIR, f"limpiador_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_filename, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
-
-# Dependencias externas
-try:
+# Cola de registros de log: la interfaz y los procesos del pool solo encolan; un único hilo escribe el archivo
+cola_log = None
+
+def _manejador_cola(cola):
+    """QueueHandler que deja el mensaje tal cual; el formato completo lo pone el manejador que escribe"""
+    manejador = QueueHandler(cola)
+    manejador.setFormatter(logging.Formatter('%(message)s'))
+    return manejador
+
+def init_logging():
+    """Crea el archivo de log y configura logging; se llama al arrancar la interfaz, no al importar el módulo"""
+    global cola_log
+    os.makedirs(LOG_DIR, exist_ok=True)
+    formato = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    manejadores = [logging.FileHandler(log_filename, encoding='utf-8'), logging.StreamHandler()]
+    for manejador in manejadores:
+        manejador.setFormatter(formato)
+    # Cola de multiprocessing (y no queue.Queue) para que los procesos del pool escriban en la misma
+    cola_log = multiprocessing.Queue(-1)
+    escucha = QueueListener(cola_log, *manejadores)
+    escucha.start()
+    pid = os.getpid()
+    # al cerrar se vacía la cola; solo en este proceso (un hijo creado con fork hereda los atexit)
+    atexit.register(lambda: os.getpid() == pid and escucha.stop())
+    logging.basicConfig(level=logging.INFO, handlers=[_manejador_cola(cola_log)])
+
+# Dependencias externas: al arrancar solo se comprueba que estén instaladas;
+# se importan en el primer uso (openpyxl y xlwings tardan en cargar y retrasaban la ventana)
+if importlib.util.find_spec("openpyxl") is None:
+    raise ImportError("Instala openpyxl: pip install openpyxl")
+if importlib.util.find_spec("dateutil") is None:
+    raise ImportError("Instala python-dateutil: pip install python-dateutil")
+
+@lru_cache(maxsize=1)
+def _cargar_openpyxl():
+    """Importa openpyxl una sola vez y publica en el módulo los nombres que usan las funciones de copia"""
+    global Workbook, load_workbook, Alignment, Cell, StyleArray
     from openpyxl import Workbook, load_workbook
-    from openpyxl.styles import numbers, Alignment
+    from openpyxl.styles import Alignment
+    from openpyxl.cell.cell import Cell
+    from openpyxl.styles.cell_style import StyleArray
     logger.info("openpyxl cargado correctamente")
-except Exception as e:
-    logger.critical(f"Error al importar openpyxl: {e}")
-    raise ImportError("Instala openpyxl: pip install openpyxl") from e
-
-try:
-    from dateutil import parser as dateparser
-    logger.info("python-dateutil cargado correctamente")
-except Exception as e:
-    logger.critical(f"Error al importar python-dateutil: {e}")
-    raise ImportError("Instala python-dateutil: pip install python-dateutil") from e
 
 # xlwings (opcional)
-USE_XLWINGS = False
-try:
-    import xlwings as xw
-    USE_XLWINGS = True
-    logger.info("xlwings disponible")
-except Exception as e:
-    USE_XLWINGS = False
-    logger.warning(f"xlwings no disponible: {e}")
+USE_XLWINGS = importlib.util.find_spec("xlwings") is not None
+
+@lru_cache(maxsize=1)
+def _get_xw():
+    """Módulo xlwings, importado en el primer uso; None si no se puede cargar"""
+    try:
+        import xlwings as xw
+        logger.info("xlwings disponible")
+        return xw
+    except Exception as e:
+        logger.warning(f"xlwings no disponible: {e}")
+        return None
+
+# Instancia de Excel oculta compartida por todos los archivos de este proceso (arrancar Excel tarda segundos)
+_app_excel = None
+
+def obtener_app_excel(xw):
+    """Devuelve la instancia de Excel del proceso, creándola si no existe o si dejó de responder"""
+    global _app_excel
+    if _app_excel is not None:
+        try:
+            len(_app_excel.books)  # sigue viva
+            return _app_excel
+        except Exception:
+            _app_excel = None
+    app = xw.App(visible=False, add_book=False)
+    app.display_alerts = False
+    app.screen_updating = False
+    _app_excel = app
+    return app
+
+def cerrar_app_excel():
+    """Cierra la instancia de Excel compartida (si se llegó a abrir)"""
+    global _app_excel
+    if _app_excel is None:
+        return
+    try:
+        _app_excel.quit()
+    except Exception as e:
+        logger.debug(f"Error cerrando Excel: {e}")
+    _app_excel = None
 
 # Carpetas por defecto
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -64,6 +123,11 @@ os.makedirs(CARPETA_LIMPIOS, exist_ok=True)
 MAX_FILE_SIZE_MB = 100  # Tamaño máximo recomendado sin advertencia
 CHUNK_SIZE = 100  # Procesar hojas en chunks para archivos grandes
 
+# Archivos que se procesan a la vez (un proceso por archivo; openpyxl no libera el GIL)
+MAX_PROCESOS = min(os.cpu_count() or 1, 8)
+# Archivos que se leen por adelantado (a la caché del sistema) además de los que se están procesando
+ARCHIVOS_PRECARGA = 2
+
 # Comportamiento para enteros largos (>15 dígitos)
 # Si False: preservarlos como texto (seguro). Si True: forzar conversión a número (puede perder precisión).
 FORCE_NUMERIC_LONGS = False
@@ -82,6 +146,12 @@ MONTH_MAP = {
 # Agregar esta línea para manejar tanto mayúsculas como minúsculas
 MONTH_MAP.update({k.lower(): v for k, v in MONTH_MAP.items()})
 
+# Patrón para detectar formato DD-MMM-AA o DD-MMM-AAAA (compilado una vez: se usa por cada celda)
+ENGLISH_DATE_RE = re.compile(r'^(\d{1,2})[-/\s\.]?([A-Za-z]{3})[-/\s\.]?(\d{2,4})$')
+
+# Tabla para str.translate: borra todo carácter ASCII que no sea dígito, punto o signo menos
+SOLO_NUMERICO_ASCII = str.maketrans('', '', ''.join(chr(i) for i in range(128) if not (chr(i).isdigit() or chr(i) in '.-')))
+
 def clean_text(s):
     """Limpia texto de manera segura"""
     try:
@@ -112,65 +182,76 @@ def try_parse_number(s):
         orig = str(s).strip()
         if orig == "":
             return None, None
+        return _parse_number_text(orig)
+    except Exception as e:
+        logger.debug(f"Error parseando número '{s}': {e}")
+        return None, None
 
-        # eliminar caracteres invisibles y espacios
-        s1 = orig.replace(NBSP, "").replace(' ', '')
+@lru_cache(maxsize=65536)
+def _parse_number_text(orig):
+    """Parseo de un texto ya recortado; cacheado porque los mismos textos se repiten en miles de celdas"""
+    # eliminar caracteres invisibles y espacios
+    s1 = orig.replace(NBSP, "").replace(' ', '')
 
-        # quitar prefijo '#' si existe (pero conservar resto)
-        if s1.startswith('#'):
-            s1 = s1.lstrip('#')
+    # solo letras (p. ej. "CERTIFICACION"): no queda ningún dígito, punto ni signo -> no es número
+    if s1.isalpha():
+        return None, None
 
-        # normalizar separadores decimales
-        cnt_dot = s1.count('.')
-        cnt_comma = s1.count(',')
-        s2 = s1
-        if cnt_dot > 0 and cnt_comma > 0:
-            s2 = s2.replace('.', '').replace(',', '.')
-        elif cnt_dot > 1 and cnt_comma == 0:
+    # quitar prefijo '#' si existe (pero conservar resto)
+    if s1.startswith('#'):
+        s1 = s1.lstrip('#')
+
+    # normalizar separadores decimales
+    cnt_dot = s1.count('.')
+    cnt_comma = s1.count(',')
+    s2 = s1
+    if cnt_dot > 0 and cnt_comma > 0:
+        s2 = s2.replace('.', '').replace(',', '.')
+    elif cnt_dot > 1 and cnt_comma == 0:
+        s2 = s2.replace('.', '')
+    elif cnt_comma > 1 and cnt_dot == 0:
+        s2 = s2.replace(',', '')
+    elif cnt_dot == 1 and cnt_comma == 0:
+        part_after = s2.split('.')[-1]
+        if len(part_after) == 3:
             s2 = s2.replace('.', '')
-        elif cnt_comma > 1 and cnt_dot == 0:
+    elif cnt_comma == 1 and cnt_dot == 0:
+        part_after = s2.split(',')[-1]
+        if len(part_after) == 3:
             s2 = s2.replace(',', '')
-        elif cnt_dot == 1 and cnt_comma == 0:
-            part_after = s2.split('.')[-1]
-            if len(part_after) == 3:
-                s2 = s2.replace('.', '')
-        elif cnt_comma == 1 and cnt_dot == 0:
-            part_after = s2.split(',')[-1]
-            if len(part_after) == 3:
-                s2 = s2.replace(',', '')
-            else:
-                s2 = s2.replace(',', '.')
+        else:
+            s2 = s2.replace(',', '.')
 
-        # conservar solo dígitos, punto y signo
+    # conservar solo dígitos, punto y signo
+    if s2.isascii():
+        clean = s2.translate(SOLO_NUMERICO_ASCII)
+    else:
         clean = ''.join(ch for ch in s2 if (ch.isdigit() or ch in '.-'))
-        if clean == "" or clean in ['.', '-', '-.']:
-            return None, None
-
-        # Si contiene punto -> float (comprobar parte entera)
-        if '.' in clean:
-            int_part = clean.split('.')[0].lstrip('-')
-            # Si la parte entera es mayor a 15 dígitos, devolver como texto para evitar pérdida de precisión
-            if len(int_part) > 15:
-                return clean, 'AS_TEXT'
-            try:
-                val = float(clean)
-                return val, 'General'
-            except Exception:
-                return clean, 'AS_TEXT'
+    if clean == "" or clean in ['.', '-', '-.']:
+        return None, None
 
-        # Entero puro: revisar longitud de dígitos
-        digits = clean.lstrip('-')
-        if len(digits) > 15:
-            # demasiados dígitos: devolver como texto
-            return digits, 'AS_TEXT'
+    # Si contiene punto -> float (comprobar parte entera)
+    if '.' in clean:
+        int_part = clean.split('.')[0].lstrip('-')
+        # Si la parte entera es mayor a 15 dígitos, devolver como texto para evitar pérdida de precisión
+        if len(int_part) > 15:
+            return clean, 'AS_TEXT'
         try:
-            val = int(clean)
+            val = float(clean)
             return val, 'General'
         except Exception:
             return clean, 'AS_TEXT'
-    except Exception as e:
-        logger.debug(f"Error parseando número '{s}': {e}")
-        return None, None
+
+    # Entero puro: revisar longitud de dígitos
+    digits = clean.lstrip('-')
+    if len(digits) > 15:
+        # demasiados dígitos: devolver como texto
+        return digits, 'AS_TEXT'
+    try:
+        val = int(clean)
+        return val, 'General'
+    except Exception:
+        return clean, 'AS_TEXT'
 
 def parse_english_month_date(date_str):
     """Convierte fechas en formato como '05-DEC-24' a objeto datetime"""
@@ -178,9 +259,8 @@ def parse_english_month_date(date_str):
         if not isinstance(date_str, str):
             return None
             
-        # Patrón para detectar formato DD-MMM-AA o DD-MMM-AAAA
-        pattern = r'^(\d{1,2})[-/\s\.]?([A-Za-z]{3})[-/\s\.]?(\d{2,4})$'
-        match = re.match(pattern, date_str.upper().strip())
+        # [A-Za-z] acepta ambos casos: solo el mes se pasa a mayúsculas para el mapeo
+        match = ENGLISH_DATE_RE.match(date_str.strip())
         
         if match:
             day = match.group(1)
@@ -223,17 +303,26 @@ def try_parse_date(s):
         text = str(s).strip()
         if text == "":
             return None
-        
+        return _parse_date_text(text)
+    except Exception as e:
+        logger.debug(f"Error parseando fecha '{s}': {e}")
+        return None
+
+@lru_cache(maxsize=65536)
+def _parse_date_text(text):
+    """Parseo de un texto de fecha ya recortado (cacheado: dateutil es caro y los textos se repiten)"""
+    try:
         # Primero intentar con el formato de mes en inglés
         english_date = parse_english_month_date(text)
         if english_date:
             return english_date
-            
-        # Si no funciona, intentar con dateparser
+
+        # Si no funciona, intentar con dateparser (importado aquí: solo se llega con textos no vistos)
+        from dateutil import parser as dateparser
         dt = dateparser.parse(text, dayfirst=True, yearfirst=False, fuzzy=False)
         return dt
     except Exception as e:
-        logger.debug(f"Error parseando fecha '{s}': {e}")
+        logger.debug(f"Error parseando fecha '{text}': {e}")
         return None
 
 # ---------------------------
@@ -275,6 +364,16 @@ def remove_tzinfo_from_workbook(wb):
     except Exception as e:
         logger.debug(f"Error en remove_tzinfo_from_workbook: {e}")
 
+def quitar_tzinfo_celda(cell):
+    """Lo mismo que remove_tzinfo_from_workbook para una celda (las hojas write_only no se pueden recorrer al final)"""
+    v = cell._value
+    if isinstance(v, (datetime, time)) and v.tzinfo is not None:
+        try:
+            cell.value = v.astimezone(timezone.utc).replace(tzinfo=None) if isinstance(v, datetime) else v.replace(tzinfo=None)
+        except Exception:
+            cell.value = v.replace(tzinfo=None)
+    return cell
+
 # ---------------------------
 # Copiar estilos y visuales (con manejo de errores mejorado)
 # ---------------------------
@@ -297,8 +396,36 @@ def is_custom_number_format(fmt):
         logger.debug(f"Error verificando formato: {e}")
         return False
 
-def copy_cell_style(src_cell, tgt_cell):
-    """Copia estilos de celda de manera segura"""
+@lru_cache(maxsize=None)
+def alineacion(**kw):
+    """Alignment compartido por combinación de parámetros (los estilos de openpyxl no se modifican tras crearse):
+    evita crear un objeto por celda y que el workbook tenga que compararlo con su tabla de estilos"""
+    return Alignment(**kw)
+
+def copy_cell_style(src_cell, tgt_cell, cache=None):
+    """Copia estilos de celda de manera segura.
+
+    cache: dict opcional {ids de estilo en origen: ids en destino}. Las celdas de una hoja repiten
+    pocas combinaciones de estilo: solo la primera se clona (copy.copy de cada objeto); las demás
+    reciben directamente los índices ya registrados en el workbook destino.
+    """
+    clave = None
+    if cache is not None:
+        try:
+            # Celdas sin estilo propio tienen _style None (openpyxl lo crea perezosamente)
+            st = src_cell._style
+            clave = (st.fontId, st.fillId, st.borderId, st.alignmentId, st.protectionId) if st else (0, 0, 0, 0, 0)
+            ids = cache.get(clave)
+            if ids is not None:
+                if tgt_cell._style is None:
+                    tgt_cell._style = StyleArray()
+                dst = tgt_cell._style
+                dst.fontId, dst.fillId, dst.borderId, dst.alignmentId, dst.protectionId = ids
+                return
+        except Exception as e:
+            logger.debug(f"Error usando caché de estilos: {e}")
+            clave = None
+
     try:
         if src_cell.font:
             tgt_cell.font = copy.copy(src_cell.font)
@@ -329,8 +456,13 @@ def copy_cell_style(src_cell, tgt_cell):
     except Exception as e:
         logger.debug(f"Error copiando protección: {e}")
 
+    if clave is not None and tgt_cell._style is not None:
+        dst = tgt_cell._style
+        cache[clave] = (dst.fontId, dst.fillId, dst.borderId, dst.alignmentId, dst.protectionId)
+
 def copy_sheet_visuals(ws_src_styles, ws_src_values, ws_tgt):
     """Copia visuales de hoja con manejo robusto de errores"""
+    _cargar_openpyxl()
     try:
         # Column widths & hidden
         for col, dim in ws_src_styles.column_dimensions.items():
@@ -365,11 +497,20 @@ def copy_sheet_visuals(ws_src_styles, ws_src_values, ws_tgt):
     except Exception as e:
         logger.warning(f"Error copiando freeze_panes: {e}")
 
+    # Hoja destino write_only (ver process_workbook_openpyxl_copy): las filas se añaden con append() y
+    # dimensiones, paneles y color de pestaña deben fijarse antes de la primera fila (ya es así arriba)
+    solo_escritura = getattr(ws_tgt.parent, "write_only", False)
+    combinadas = set()  # celdas cubiertas por una combinación, salvo la superior izquierda
+
     try:
         # Merged cells
         for merge in ws_src_styles.merged_cells.ranges:
             try:
-                ws_tgt.merge_cells(str(merge))
+                if solo_escritura:
+                    ws_tgt.merged_cells.add(str(merge))
+                    combinadas.update(itertools.islice(merge.cells, 1, None))
+                else:
+                    ws_tgt.merge_cells(str(merge))
             except Exception as e:
                 logger.debug(f"Error mergeando celda {merge}: {e}")
     except Exception as e:
@@ -387,43 +528,81 @@ def copy_sheet_visuals(ws_src_styles, ws_src_values, ws_tgt):
         max_r = min(ws_src_styles.max_row, 1048576)  # Límite Excel
         max_c = min(ws_src_styles.max_column, 16384)  # Límite Excel
         
-        logger.info(f"Procesando hoja '{ws_src_styles.title}': {max_r} filas x {max_c} columnas")
+        logger.debug(f"Procesando hoja '{ws_src_styles.title}': {max_r} filas x {max_c} columnas")
         
-        # Procesar en chunks para archivos grandes
-        chunk_rows = 1000
-        for start_row in range(1, max_r + 1, chunk_rows):
-            end_row = min(start_row + chunk_rows - 1, max_r)
-            
-            for r in range(start_row, end_row + 1):
-                for c in range(1, max_c + 1):
-                    try:
-                        process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c)
-                    except Exception as e:
-                        logger.debug(f"Error procesando celda ({r},{c}): {e}")
-                        # Continuar con la siguiente celda
-            
-            # Liberar memoria periódicamente
-            if start_row % 5000 == 0:
-                gc.collect()
-                
+        # Recorrer fila a fila: celdas de estilo y valores planos (values_only) en paralelo,
+        # en lugar de dos búsquedas ws.cell(row=r, column=c) por celda
+        filas_estilo = ws_src_styles.iter_rows(min_row=1, max_row=max_r, max_col=max_c)
+        filas_valor = None
+        if ws_src_values is not None:
+            filas_valor = ws_src_values.iter_rows(min_row=1, max_row=max_r, max_col=max_c, values_only=True)
+        # en modo read_only la hoja de valores termina en su última fila con datos
+        fila_vacia = (None,) * max_c
+
+        cache_estilos = {}  # estilos de origen ya copiados en esta hoja (ver copy_cell_style)
+        for r, celdas in enumerate(filas_estilo, start=1):
+            valores = next(filas_valor, fila_vacia) if filas_valor is not None else None
+            fila = []
+            for c, cell_style in enumerate(celdas, start=1):
+                raw_value = valores[c - 1] if valores is not None else cell_style.value
+                tgt = None
+                try:
+                    tgt = process_cell_value(cell_style, raw_value, ws_tgt, r, c, cache_estilos)
+                except Exception as e:
+                    logger.debug(f"Error procesando celda ({r},{c}): {e}")
+                    # Continuar con la siguiente celda
+                if solo_escritura:
+                    # en una celda combinada solo queda el estilo, y solo si no traía valor (como con merge_cells)
+                    if tgt is not None and (tgt._value is None or (r, c) not in combinadas):
+                        fila.append(quitar_tzinfo_celda(tgt))
+                    else:
+                        fila.append(None)
+            if solo_escritura:
+                ws_tgt.append(fila)
+
+        if solo_escritura:
+            # filas con alto u ocultas más allá de los datos: en write_only solo existen las filas añadidas
+            for _ in range(max_r, max(ws_tgt.row_dimensions.keys(), default=0)):
+                ws_tgt.append([])
+
     except Exception as e:
         logger.error(f"Error crítico copiando celdas: {e}")
         raise
 
+def nueva_celda(ws_tgt, r, c, value):
+    """Crea la celda destino directamente (como hace Worksheet.append), sin el recorrido de ws.cell().
+
+    Si la coordenada ya existe (p. ej. una MergedCell creada por merge_cells) se usa ws.cell()
+    para conservar exactamente el comportamiento de siempre.
+    """
+    if ws_tgt.parent.write_only:
+        # hoja write_only: la celda no se registra, copy_sheet_visuals la añade a la fila con append()
+        return Cell(ws_tgt, row=r, column=c, value=value)
+    if (r, c) in ws_tgt._cells:
+        return ws_tgt.cell(row=r, column=c, value=value)
+    celda = Cell(ws_tgt, row=r, column=c, value=value)
+    ws_tgt._add_cell(celda)
+    return celda
+
 def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
-    """Procesa una celda individual de manera segura"""
-    try:
-        cell_style = ws_src_styles.cell(row=r, column=c)
-        
-        # Obtener valor
-        if ws_src_values is not None:
-            try:
-                raw_value = ws_src_values.cell(row=r, column=c).value
-            except Exception:
-                raw_value = cell_style.value
-        else:
+    """Procesa una celda individual de manera segura (buscándola por coordenadas)"""
+    _cargar_openpyxl()
+    cell_style = ws_src_styles.cell(row=r, column=c)
+
+    # Obtener valor
+    if ws_src_values is not None:
+        try:
+            raw_value = ws_src_values.cell(row=r, column=c).value
+        except Exception:
             raw_value = cell_style.value
+    else:
+        raw_value = cell_style.value
+    process_cell_value(cell_style, raw_value, ws_tgt, r, c)
 
+def process_cell_value(cell_style, raw_value, ws_tgt, r, c, cache_estilos=None):
+    """Procesa una celda ya leída: celda de origen (estilos) y su valor. Devuelve la celda destino (o None)"""
+    tgt = None
+    try:
         # Si raw_value es datetime con tzinfo, limpiar para evitar problemas al guardar
         try:
             if isinstance(raw_value, datetime) and raw_value.tzinfo is not None:
@@ -452,8 +631,8 @@ def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
                 if parsed_num is not None:
                     final_val = parsed_num / 100.0 if isinstance(parsed_num, (int, float)) else None
                     if final_val is not None:
-                        tgt = ws_tgt.cell(row=r, column=c, value=final_val)
-                        copy_cell_style(cell_style, tgt)
+                        tgt = nueva_celda(ws_tgt, r, c, final_val)
+                        copy_cell_style(cell_style, tgt, cache_estilos)
                         if custom_fmt:
                             try:
                                 if orig_fmt:
@@ -465,7 +644,7 @@ def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
                                 tgt.number_format = '0.00%'
                             except Exception:
                                 pass
-                        return
+                        return tgt
             except Exception:
                 pass
 
@@ -476,8 +655,8 @@ def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
             # Intentar parsear como fecha con mes en inglés primero
             parsed_date = try_parse_date(val)
             if parsed_date is not None:
-                tgt = ws_tgt.cell(row=r, column=c, value=parsed_date)
-                copy_cell_style(cell_style, tgt)
+                tgt = nueva_celda(ws_tgt, r, c, parsed_date)
+                copy_cell_style(cell_style, tgt, cache_estilos)
                 if not custom_fmt:
                     try:
                         tgt.number_format = 'dd-mm-yyyy'  
@@ -489,7 +668,7 @@ def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
                             tgt.number_format = orig_fmt
                     except Exception:
                         pass
-                return
+                return tgt
 
             parsed_num, tag = try_parse_number(val)
             if parsed_num is not None:
@@ -497,21 +676,21 @@ def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
                 if tag == 'AS_TEXT':
                     # Modo seguro por defecto (OPCIÓN A): PRESERVAR como texto pero mejorar apariencia
                     text_to_write = str(parsed_num)
-                    tgt = ws_tgt.cell(row=r, column=c, value=text_to_write)
-                    copy_cell_style(cell_style, tgt)
+                    tgt = nueva_celda(ws_tgt, r, c, text_to_write)
+                    copy_cell_style(cell_style, tgt, cache_estilos)
                     try:
                         tgt.number_format = '@'  # forzar formato texto
                     except Exception:
                         pass
                     try:
-                        tgt.alignment = Alignment(horizontal='right')  # parecer número (alineado a la derecha)
+                        tgt.alignment = alineacion(horizontal='right')  # parecer número (alineado a la derecha)
                     except Exception:
                         pass
-                    return
+                    return tgt
                 else:
                     # tag == 'General' -> escribir como número (int/float seguro)
-                    tgt = ws_tgt.cell(row=r, column=c, value=parsed_num)
-                    copy_cell_style(cell_style, tgt)
+                    tgt = nueva_celda(ws_tgt, r, c, parsed_num)
+                    copy_cell_style(cell_style, tgt, cache_estilos)
                     if not custom_fmt:
                         try:
                             if isinstance(parsed_num, float) and parsed_num.is_integer():
@@ -528,10 +707,10 @@ def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
                                 tgt.number_format = orig_fmt
                         except Exception:
                             pass
-                    return
+                    return tgt
 
-            tgt = ws_tgt.cell(row=r, column=c, value=val)
-            copy_cell_style(cell_style, tgt)
+            tgt = nueva_celda(ws_tgt, r, c, val)
+            copy_cell_style(cell_style, tgt, cache_estilos)
             if not custom_fmt:
                 try:
                     tgt.number_format = '@'
@@ -543,11 +722,11 @@ def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
                         tgt.number_format = orig_fmt
                 except Exception:
                     pass
-            return
+            return tgt
 
         # Si no es string: escribir tal cual
-        tgt = ws_tgt.cell(row=r, column=c, value=raw_value)
-        copy_cell_style(cell_style, tgt)
+        tgt = nueva_celda(ws_tgt, r, c, raw_value)
+        copy_cell_style(cell_style, tgt, cache_estilos)
 
         if custom_fmt:
             try:
@@ -575,6 +754,7 @@ def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
                     tgt.number_format = '@'
             except Exception:
                 pass
+        return tgt
                 
     except Exception as e:
         logger.debug(f"Error en process_cell({r},{c}): {e}")
@@ -583,6 +763,7 @@ def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
             ws_tgt.cell(row=r, column=c, value=None)
         except:
             pass
+        return tgt
 
 # ---------------------------
 # Generar nombre único
@@ -590,8 +771,8 @@ def process_cell(ws_src_styles, ws_src_values, ws_tgt, r, c):
 def _unique_out_path(dest_folder: Path, name: str):
     """Genera ruta única para archivo de salida"""
     try:
-        base = Path(name).stem
-        ext = Path(name).suffix or ".xlsx"
+        base, ext = os.path.splitext(name)
+        ext = ext or ".xlsx"
         out = dest_folder / (base + ext)
         if not out.exists():
             return out
@@ -629,11 +810,34 @@ def is_temp_excel_file(filename):
 # ---------------------------
 # Variante xlwings in-place
 # ---------------------------
+XL_CELLTYPE_FORMULAS = -4123  # constante xlCellTypeFormulas de Excel
+MAX_AREAS_FORMULAS = 200  # con más bloques sueltos sale más barato reescribir toda la hoja de una vez
+
+def _formulas_a_valores_excel(sh):
+    """Reemplaza por su valor solo las celdas con fórmula de la hoja, sin sacar el resto de datos de Excel.
+    Devuelve cuántas áreas se reescribieron."""
+    try:
+        celdas = sh.api.UsedRange.SpecialCells(XL_CELLTYPE_FORMULAS)
+    except Exception:
+        if sh.api.ProtectContents:
+            raise RuntimeError("hoja protegida")
+        return 0  # Excel lanza error en vez de devolver un rango vacío cuando no hay fórmulas
+    areas = celdas.Areas
+    if areas.Count > MAX_AREAS_FORMULAS:
+        rng = sh.used_range
+        rng.raw_value = rng.raw_value
+        return areas.Count
+    for i in range(1, areas.Count + 1):
+        area = areas.Item(i)
+        area.Value2 = area.Value2  # Value2: sin conversión de fechas/moneda en el viaje
+    return areas.Count
+
 def process_workbook_xlwings_inplace(filepath, dest_folder):
     """Procesa con xlwings de manera robusta"""
     logger.info(f"Iniciando proceso xlwings para: {filepath}")
     
-    if not USE_XLWINGS:
+    xw = _get_xw() if USE_XLWINGS else None
+    if xw is None:
         raise RuntimeError("xlwings no está disponible")
 
     path = Path(filepath)
@@ -650,39 +854,51 @@ def process_workbook_xlwings_inplace(filepath, dest_folder):
         if size_mb > MAX_FILE_SIZE_MB:
             logger.warning(f"Archivo grande detectado: {size_mb:.2f} MB")
         
-        # Copiar archivo
-        logger.info(f"Copiando archivo a: {out_path}")
-        shutil.copy2(str(path), str(out_path))
-
-        # Abrir con xlwings
+        # Se abre el original en solo lectura y Excel lo guarda directamente en destino: una sola escritura, sin copia previa
         logger.info("Abriendo con xlwings...")
-        app = xw.App(visible=False, add_book=False)
-        wb = app.books.open(str(out_path))
+        app = obtener_app_excel(xw)
+        wb = app.books.open(str(path), read_only=True)
+
+        # Sin recálculo ni eventos mientras se reescriben las hojas: cada escritura recalcularía el libro
+        calculo_original = None
+        try:
+            calculo_original = app.calculation
+            app.calculation = 'manual'
+            app.api.EnableEvents = False
+        except Exception as e:
+            logger.debug(f"No se pudo desactivar cálculo/eventos: {e}")
 
         # Procesar hojas
         total_sheets = len(wb.sheets)
         logger.info(f"Procesando {total_sheets} hojas...")
         
-        for idx, sh in enumerate(wb.sheets, 1):
+        try:
+            for idx, sh in enumerate(wb.sheets, 1):
+                try:
+                    logger.debug(f"Procesando hoja {idx}/{total_sheets}: {sh.name}")
+                    n_areas = _formulas_a_valores_excel(sh)
+                    logger.debug(f"Hoja {sh.name}: {n_areas} bloque(s) con fórmulas reemplazados por valores")
+                except Exception as e:
+                    logger.warning(f"Error en hoja {sh.name}: {e}")
+                    try:
+                        used = sh.api.UsedRange
+                        rng2 = sh.range(used.Address)
+                        vals2 = rng2.value
+                        rng2.value = vals2
+                    except Exception as e2:
+                        logger.error(f"Error crítico en hoja {sh.name}: {e2}")
+        finally:
+            # el modo de cálculo se guarda en el archivo: restaurarlo antes de guardar
             try:
-                logger.info(f"Procesando hoja {idx}/{total_sheets}: {sh.name}")
-                rng = sh.used_range
-                vals = rng.value
-                rng.value = vals
+                if calculo_original is not None:
+                    app.calculation = calculo_original
+                app.api.EnableEvents = True
             except Exception as e:
-                logger.warning(f"Error en hoja {sh.name}: {e}")
-                try:
-                    used = sh.api.UsedRange
-                    rng2 = sh.range(used.Address)
-                    vals2 = rng2.value
-                    rng2.value = vals2
-                except Exception as e2:
-                    logger.error(f"Error crítico en hoja {sh.name}: {e2}")
-
-        logger.info("Guardando archivo...")
-        wb.save()
+                logger.debug(f"No se pudo restaurar cálculo/eventos: {e}")
+
+        logger.info(f"Guardando archivo en: {out_path}")
+        wb.save(str(out_path))
         wb.close()
-        app.quit()
         
         logger.info(f"Proceso xlwings completado: {out_path}")
         return str(out_path)
@@ -697,20 +913,115 @@ def process_workbook_xlwings_inplace(filepath, dest_folder):
                 wb.close()
         except:
             pass
-        try:
-            if app:
-                app.quit()
-        except:
-            pass
+        if app:
+            # Excel pudo quedar en mal estado: el siguiente archivo arranca una instancia nueva
+            cerrar_app_excel()
         
         raise RuntimeError(f"Error al procesar con xlwings: {e}")
 
 # ---------------------------
 # Proceso principal openpyxl
 # ---------------------------
+# Las fórmulas de celda son elementos <f> dentro de <sheetData>, con el prefijo que use la hoja para el espacio de
+# nombres principal (normalmente ninguno; a veces <x:f>). Fuera de ahí hay otros <f> que no son de celdas, como
+# <xm:f> en las validaciones y formatos condicionales x14 de extLst: esos no se tocan.
+RE_INICIO_SHEETDATA = re.compile(rb"<((?:[A-Za-z_][\w.-]*:)?)sheetData(?:\s[^>]*)?(/?)>")
+
+@lru_cache(maxsize=None)
+def _regex_celdas(prefijo):
+    """(elemento <f> completo, cierre de </sheetData>) para el prefijo dado.
+    <f .../> o <f ...>texto</f>: el texto de una fórmula nunca contiene '<'"""
+    p = re.escape(prefijo)
+    return (re.compile(rb"<" + p + rb"f(?:\s[^>]*)?(?:/>|>[^<]*</" + p + rb"f\s*>)"),
+            re.compile(rb"</" + p + rb"sheetData\s*>"))
+
+def _corte_seguro(buf):
+    """Posición hasta la que `buf` puede procesarse sin partir un elemento <f>: el último '<' que seguro no es un cierre"""
+    i = buf.rfind(b"<")
+    while i > 0 and buf[i + 1:i + 2] in (b"/", b""):
+        i = buf.rfind(b"<", 0, i)
+    return max(i, 0)
+
+def _trozos_hoja(origen):
+    """Lee por bloques el XML de una hoja (archivo abierto) y lo entrega como pares (trozo, re_formula).
+    re_formula es la regex de las fórmulas de celda en los trozos de <sheetData> y None en el resto.
+    Ningún corte parte un elemento <f>"""
+    pendiente = b""
+    re_formula = re_fin = None
+    estado = 0  # 0: antes de <sheetData>, 1: dentro, 2: después
+    final = False
+    while not final:
+        bloque = origen.read(1 << 20)
+        final = not bloque
+        pendiente += bloque
+        while pendiente:
+            if estado == 0:
+                m = RE_INICIO_SHEETDATA.search(pendiente)
+                if m:
+                    yield pendiente[:m.end()], None
+                    pendiente = pendiente[m.end():]
+                    if m.group(2):  # <sheetData/>: hoja sin celdas
+                        estado = 2
+                    else:
+                        estado = 1
+                        re_formula, re_fin = _regex_celdas(m.group(1))
+                    continue
+                corte = pendiente.rfind(b"<")  # la etiqueta pudo quedar partida entre dos bloques
+                if final or corte < 0:
+                    corte = len(pendiente)
+            elif estado == 1:
+                m = re_fin.search(pendiente)
+                if m:
+                    yield pendiente[:m.start()], re_formula
+                    pendiente = pendiente[m.start():]
+                    estado = 2
+                    continue
+                corte = len(pendiente) if final else _corte_seguro(pendiente)
+                yield pendiente[:corte], re_formula
+                pendiente = pendiente[corte:]
+                break
+            else:
+                corte = len(pendiente)
+            yield pendiente[:corte], None
+            pendiente = pendiente[corte:]
+            break
+
+def _workbook_has_formulas(path):
+    """True si alguna hoja del .xlsx contiene fórmulas. Lee el XML por bloques; ante cualquier duda devuelve True"""
+    try:
+        with zipfile.ZipFile(path) as z:
+            for nombre in z.namelist():
+                if not (nombre.startswith("xl/worksheets/") and nombre.endswith(".xml")):
+                    continue
+                with z.open(nombre) as f:
+                    for trozo, re_formula in _trozos_hoja(f):
+                        if re_formula and re_formula.search(trozo):
+                            return True
+        return False
+    except Exception as e:
+        logger.debug(f"No se pudo revisar fórmulas en {path}: {e}")
+        return True
+
+def _sin_gc(func):
+    """Desactiva el recolector de ciclos mientras corre func (openpyxl crea millones de objetos pequeños,
+    casi sin ciclos) y hace una única recolección al terminar, también si hubo error"""
+    @wraps(func)
+    def envoltura(*args, **kwargs):
+        activo = gc.isenabled()
+        gc.disable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if activo:
+                gc.enable()
+            gc.collect()
+    return envoltura
+
+@_sin_gc
 def process_workbook_openpyxl_copy(filepath, dest_folder):
     """Procesa con openpyxl de manera robusta"""
     logger.info(f"Iniciando proceso openpyxl para: {filepath}")
+    _cargar_openpyxl()
     
     path = Path(filepath)
     dest_folder = Path(dest_folder)
@@ -723,15 +1034,22 @@ def process_workbook_openpyxl_copy(filepath, dest_folder):
         if size_mb > MAX_FILE_SIZE_MB:
             logger.warning(f"Archivo grande detectado: {size_mb:.2f} MB. El proceso puede tardar.")
 
+        # Sin fórmulas los valores guardados son los mismos que lee el libro de estilos:
+        # no hace falta la segunda carga (data_only) ni pedirle los valores a Excel
+        tiene_formulas = _workbook_has_formulas(path)
+        if not tiene_formulas:
+            logger.info("El libro no tiene fórmulas: los valores se leen del libro de estilos")
+
         # Intentar obtener valores con xlwings si está disponible (opcional)
         values_by_sheet = {}
         used_xlwings_for_values = False
         
-        if USE_XLWINGS and size_mb < MAX_FILE_SIZE_MB:
+        xw = _get_xw() if USE_XLWINGS and tiene_formulas and size_mb < MAX_FILE_SIZE_MB else None
+        if xw is not None:
+            wb_x = None
             try:
                 logger.info("Intentando obtener valores con xlwings...")
-                app = xw.App(visible=False, add_book=False)
-                wb_x = app.books.open(str(path))
+                wb_x = obtener_app_excel(xw).books.open(str(path))
                 for sh in wb_x.sheets:
                     try:
                         vals = sh.used_range.value
@@ -739,15 +1057,16 @@ def process_workbook_openpyxl_copy(filepath, dest_folder):
                     except Exception as e:
                         logger.warning(f"Error obteniendo valores de hoja {sh.name}: {e}")
                 wb_x.close()
-                app.quit()
                 used_xlwings_for_values = True
                 logger.info("Valores obtenidos con xlwings exitosamente")
             except Exception as e:
                 logger.warning(f"No se pudo usar xlwings para valores: {e}")
                 try:
-                    app.quit()
+                    if wb_x is not None:
+                        wb_x.close()
                 except:
                     pass
+                cerrar_app_excel()
                 used_xlwings_for_values = False
 
         # Cargar workbooks
@@ -800,17 +1119,24 @@ def process_workbook_openpyxl_copy(filepath, dest_folder):
                             ws_v.cell(row=r_idx, column=c_idx, value=cell_val)
                         except Exception as e:
                             logger.debug(f"Error procesando valor ({r_idx},{c_idx}): {e}")
-        else:
+        elif tiene_formulas:
             logger.info("Cargando workbook con valores (data_only)...")
+            # Solo se leen valores fila a fila (iter_rows values_only): modo read_only, sin crear un objeto
+            # Cell por celda. El libro de estilos sigue completo: dimensiones, combinadas y paneles no existen en read_only.
             try:
-                wb_values = load_workbook(filename=str(path), data_only=True, read_only=False)
+                wb_values = load_workbook(filename=str(path), data_only=True, read_only=True, keep_links=False)
             except Exception as e:
-                logger.warning(f"No se pudo cargar workbook con data_only: {e}")
-                wb_values = None
+                logger.warning(f"No se pudo cargar workbook con data_only en modo read_only: {e}")
+                try:
+                    wb_values = load_workbook(filename=str(path), data_only=True, read_only=False)
+                except Exception as e:
+                    logger.warning(f"No se pudo cargar workbook con data_only: {e}")
+                    wb_values = None
 
         # Crear nuevo workbook
         logger.info("Creando nuevo workbook...")
-        new_wb = Workbook()
+        # write_only: cada fila se vuelca a disco al añadirla, la hoja destino no queda entera en memoria
+        new_wb = Workbook(write_only=True)
         if new_wb.worksheets:
             new_wb.remove(new_wb.worksheets[0])
 
@@ -818,17 +1144,14 @@ def process_workbook_openpyxl_copy(filepath, dest_folder):
         total_sheets = len(wb_styles.sheetnames)
         for idx, sheetname in enumerate(wb_styles.sheetnames, 1):
             try:
-                logger.info(f"Procesando hoja {idx}/{total_sheets}: {sheetname}")
+                logger.debug(f"Procesando hoja {idx}/{total_sheets}: {sheetname}")
                 ws_src_styles = wb_styles[sheetname]
                 ws_src_values = None
                 if wb_values is not None and sheetname in wb_values.sheetnames:
                     ws_src_values = wb_values[sheetname]
                 ws_tgt = new_wb.create_sheet(title=sheetname)
                 copy_sheet_visuals(ws_src_styles, ws_src_values, ws_tgt)
-                
-                # Liberar memoria
-                gc.collect()
-                
+
             except Exception as e:
                 logger.error(f"Error procesando hoja {sheetname}: {e}")
                 logger.error(traceback.format_exc())
@@ -870,9 +1193,6 @@ def process_workbook_openpyxl_copy(filepath, dest_folder):
         except:
             pass
         
-        # Liberar memoria
-        gc.collect()
-        
         logger.info(f"Proceso openpyxl completado: {out_path}")
         return str(out_path)
         
@@ -881,20 +1201,86 @@ def process_workbook_openpyxl_copy(filepath, dest_folder):
         logger.error(traceback.format_exc())
         raise
 
+# ---------------------------
+# Proceso rápido: copia del .xlsx quitando las fórmulas del XML
+# ---------------------------
+# calcChain.xml solo lista celdas con fórmula; sin fórmulas Excel lo da por dañado
+RE_CALCCHAIN_CT = re.compile(rb"<Override[^>]*calcChain\.xml[^>]*/>")
+RE_CALCCHAIN_REL = re.compile(rb"<Relationship[^>]*calcChain\.xml[^>]*/>")
+# Partes que ya vienen comprimidas (imágenes, multimedia): se guardan sin volver a comprimir
+EXT_YA_COMPRIMIDAS = (".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff", ".emz", ".wmz", ".wdp", ".mp3", ".mp4", ".zip")
+
+def _quitar_formulas_xml(origen, destino):
+    """Copia el XML de una hoja de `origen` a `destino` (archivos abiertos) sin las fórmulas de las celdas; deja los <v>"""
+    for trozo, re_formula in _trozos_hoja(origen):
+        destino.write(re_formula.sub(b"", trozo) if re_formula else trozo)
+
+def process_workbook_zip_patch(filepath, dest_folder):
+    """Copia el .xlsx reemplazando fórmulas por su último valor calculado, editando directamente el XML.
+
+    No pasa por openpyxl: conserva gráficos, tablas dinámicas, imágenes y macros, pero no limpia textos
+    (fechas/números) como el proceso openpyxl. Una fórmula sin valor guardado queda como celda vacía.
+    """
+    logger.info(f"Iniciando proceso rápido (zip) para: {filepath}")
+    path = Path(filepath)
+    dest_folder = Path(dest_folder)
+    dest_folder.mkdir(parents=True, exist_ok=True)
+    out_path = _unique_out_path(dest_folder, path.name)
+
+    try:
+        # Nivel 1 de deflate: varias veces más rápido que el nivel por defecto; a Excel le da igual el tamaño
+        with zipfile.ZipFile(path) as zin, \
+                zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zout:
+            for info in zin.infolist():
+                nombre = info.filename
+                if nombre == "xl/calcChain.xml":
+                    continue
+                if info.compress_type == zipfile.ZIP_STORED or nombre.lower().endswith(EXT_YA_COMPRIMIDAS):
+                    # ZipInfo nuevo (el del origen trae tamaños y offsets que ya no valen), sin compresión
+                    parte_out = zipfile.ZipInfo(nombre, date_time=info.date_time)
+                    parte_out.compress_type = zipfile.ZIP_STORED
+                else:
+                    parte_out = nombre  # toma la compresión por defecto de zout
+                with zin.open(info) as origen, zout.open(parte_out, "w") as destino:
+                    if nombre.startswith("xl/worksheets/") and nombre.endswith(".xml"):
+                        _quitar_formulas_xml(origen, destino)
+                    elif nombre == "[Content_Types].xml":
+                        destino.write(RE_CALCCHAIN_CT.sub(b"", origen.read()))
+                    elif nombre == "xl/_rels/workbook.xml.rels":
+                        destino.write(RE_CALCCHAIN_REL.sub(b"", origen.read()))
+                    else:
+                        shutil.copyfileobj(origen, destino, 1 << 20)
+        shutil.copystat(str(path), str(out_path))
+        logger.info(f"Proceso rápido completado: {out_path}")
+        return str(out_path)
+    except Exception as e:
+        logger.error(f"Error en proceso rápido: {e}")
+        logger.error(traceback.format_exc())
+        try:
+            out_path.unlink()
+        except OSError:
+            pass
+        if isinstance(e, zipfile.BadZipFile):
+            raise RuntimeError(f"{path.name} no es un .xlsx/.xlsm (el modo rápido no admite .xls)")
+        raise
+
 # ---------------------------
 # Wrapper principal
 # ---------------------------
-def process_workbook(filepath, dest_folder, use_xlwings_mode=False):
+def process_workbook(filepath, dest_folder, use_xlwings_mode=False, use_zip_mode=False):
     """Wrapper principal con manejo robusto de errores"""
     try:
         logger.info(f"{'='*60}")
         logger.info(f"Iniciando procesamiento: {filepath}")
         logger.info(f"Modo xlwings: {use_xlwings_mode}")
+        logger.info(f"Modo rápido (zip): {use_zip_mode}")
         
         if use_xlwings_mode:
             if not USE_XLWINGS:
                 raise RuntimeError("xlwings no está disponible")
             return process_workbook_xlwings_inplace(filepath, dest_folder)
+        elif use_zip_mode:
+            return process_workbook_zip_patch(filepath, dest_folder)
         else:
             return process_workbook_openpyxl_copy(filepath, dest_folder)
             
@@ -920,7 +1306,8 @@ def preguntar_carpeta_destino_var(carpeta_root):
         seleccion = simpledialog.askstring("Destino de archivos", opciones_msg)
         
         if seleccion == "2":
-            subcarpetas = [d for d in os.listdir(carpeta_root) if os.path.isdir(os.path.join(carpeta_root, d))]
+            with os.scandir(carpeta_root) as entradas:
+                subcarpetas = [e.name for e in entradas if e.is_dir()]
             if not subcarpetas:
                 messagebox.showinfo("Sin subcarpetas", "No hay subcarpetas disponibles. Se usará la carpeta raíz.")
                 return carpeta_root
@@ -949,7 +1336,202 @@ def convertir_xls_a_xlsx_si_necesario(path):
     """Placeholder para conversión XLS (no implementado)"""
     return path
 
-def procesar_carpeta(carpeta, use_xlwings_mode=False):
+def _init_worker_excel(cola):
+    """Inicializador de cada proceso del pool: sus registros van a la cola de log de la interfaz"""
+    if cola is not None:
+        # force: con fork el proceso hereda los manejadores del padre
+        logging.basicConfig(level=logging.INFO, handlers=[_manejador_cola(cola)], force=True)
+    # el Excel compartido del proceso se cierra cuando el pool termina
+    atexit.register(cerrar_app_excel)
+
+def _procesar_archivo(ruta, carpeta_destino, use_xlwings_mode=False, use_zip_mode=False):
+    """Procesa un archivo (en un proceso del pool); devuelve (ruta_salida, None) o (None, mensaje_error)"""
+    try:
+        ruta_proc = convertir_xls_a_xlsx_si_necesario(ruta)
+        return process_workbook(ruta_proc, carpeta_destino, use_xlwings_mode=use_xlwings_mode,
+                                use_zip_mode=use_zip_mode), None
+    except Exception as e:
+        # process_workbook ya registró el traceback; el error viaja como texto (siempre serializable)
+        return None, str(e)
+
+def _precargar_archivos(rutas, turnos, parar):
+    """Hilo lector: lee de antemano los archivos que siguen para que el proceso que los abra los encuentre en la
+    caché del sistema (útil sobre todo en carpetas de red). `turnos` limita cuántos se adelantan."""
+    for ruta in rutas:
+        turnos.acquire()
+        if parar.is_set():
+            return
+        try:
+            with open(ruta, "rb") as f:
+                while f.read(1 << 20):
+                    pass
+        except OSError as e:
+            logger.debug(f"No se pudo precargar {ruta}: {e}")
+
+def _trabajo_carpeta(carpeta, a_procesar, carpeta_destino, use_xlwings_mode, use_zip_mode, total, cola):
+    """Hilo de trabajo de procesar_carpeta: no toca widgets, todo lo que la interfaz debe mostrar va a `cola`.
+
+    Mensajes: ("estado", texto), ("hecho", i, archivo, ruta_salida), ("error", i, archivo, mensaje),
+    ("fin", None) o ("fin", mensaje_error_critico).
+    """
+    com_iniciado = False
+    parar_precarga = threading.Event()
+    turnos_precarga = threading.Semaphore(0)
+    try:
+        # Un proceso por archivo. En modo xlwings un único proceso (Excel/COM no admite trabajo en paralelo),
+        # igualmente fuera del proceso de la interfaz.
+        n_procesos = 1 if use_xlwings_mode else min(MAX_PROCESOS, len(a_procesar))
+        pendientes = list(a_procesar)
+        hechos = total - len(a_procesar)  # los omitidos cuentan como ya vistos en la barra
+        logger.info(f"Iniciando procesamiento de {len(a_procesar)} archivos...")
+
+        # Lectura anticipada: los archivos en curso más ARCHIVOS_PRECARGA; cada archivo terminado libera un turno
+        for _ in range(n_procesos + ARCHIVOS_PRECARGA):
+            turnos_precarga.release()
+        threading.Thread(
+            target=_precargar_archivos,
+            args=([os.path.join(carpeta, a) for a in pendientes], turnos_precarga, parar_precarga),
+            name="precarga", daemon=True,
+        ).start()
+
+        if pendientes and (n_procesos > 1 or use_xlwings_mode):
+            cola.put(("estado", f"Procesando {len(pendientes)} archivo(s) en {n_procesos} proceso(s)..."))
+            try:
+                with ProcessPoolExecutor(max_workers=n_procesos, initializer=_init_worker_excel,
+                                         initargs=(cola_log,)) as ex:
+                    futuros = {
+                        ex.submit(_procesar_archivo, os.path.join(carpeta, archivo), carpeta_destino,
+                                  use_xlwings_mode, use_zip_mode): archivo
+                        for archivo in pendientes
+                    }
+                    for fut in as_completed(futuros):
+                        archivo = futuros[fut]
+                        out, error = fut.result()
+                        pendientes.remove(archivo)
+                        turnos_precarga.release()
+                        hechos += 1
+                        cola.put(("hecho", hechos, archivo, out) if error is None else ("error", hechos, archivo, error))
+            except Exception as e:
+                # p. ej. el pool no pudo arrancar: lo que falte se procesa aquí mismo, uno a uno
+                logger.warning(f"No se pudo procesar en paralelo, se continúa secuencialmente: {e}")
+
+        if pendientes and use_xlwings_mode and sys.platform.startswith('win'):
+            # Excel por COM desde un hilo que no es el principal requiere inicializar COM en ese hilo
+            try:
+                import pythoncom
+                pythoncom.CoInitialize()
+                com_iniciado = True
+            except Exception as e:
+                logger.warning(f"No se pudo inicializar COM en el hilo de trabajo: {e}")
+        for archivo in pendientes:
+            logger.info(f"[{hechos + 1}/{total}] Procesando: {archivo}")
+            cola.put(("estado", f"Procesando [{hechos + 1}/{total}]: {archivo}"))
+            out, error = _procesar_archivo(os.path.join(carpeta, archivo), carpeta_destino,
+                                           use_xlwings_mode, use_zip_mode)
+            turnos_precarga.release()
+            hechos += 1
+            cola.put(("hecho", hechos, archivo, out) if error is None else ("error", hechos, archivo, error))
+        cola.put(("fin", None))
+    except Exception as e:
+        logger.error(f"Error crítico en el hilo de procesamiento: {e}")
+        logger.error(traceback.format_exc())
+        cola.put(("fin", str(e)))
+    finally:
+        parar_precarga.set()
+        turnos_precarga.release()  # por si el lector espera turno
+        # Excel compartido abierto en este hilo (archivos procesados aquí mismo)
+        cerrar_app_excel()
+        if com_iniciado:
+            pythoncom.CoUninitialize()
+
+def _atender_cola(cola, total, carpeta_destino, resultado):
+    """Hilo de Tk: vuelca en los widgets los mensajes del hilo de trabajo y se reprograma hasta recibir "fin"."""
+    try:
+        while True:
+            tipo, *datos = cola.get_nowait()
+            if tipo == "estado":
+                etiqueta_estado_var.set(datos[0])
+            elif tipo == "hecho":
+                hechos, archivo, out = datos
+                progreso["value"] = hechos
+                resultado["exitosos"] += 1
+                etiqueta_estado_var.set(f"✓ Completado [{hechos}/{total}]: {Path(out).name}")
+                logger.info(f"✓ Archivo procesado exitosamente: {out}")
+            elif tipo == "error":
+                hechos, archivo, error = datos
+                progreso["value"] = hechos
+                resultado["errores"].append(f"{archivo}: {error[:100]}")
+                logger.error(f"✗ Error procesando {archivo}: {error}")
+                etiqueta_estado_var.set(f"✗ Error [{hechos}/{total}]: {archivo}")
+            elif tipo == "fin":
+                btn_select.state(['!disabled'])
+                if datos[0] is not None:
+                    messagebox.showerror("Error crítico", f"Error inesperado:\n{datos[0]}\n\nRevisa el log: {log_filename}")
+                else:
+                    mostrar_resumen(total, resultado["exitosos"], resultado["errores"], carpeta_destino,
+                                    resultado["al_dia"])
+                return
+    except queue.Empty:
+        pass
+    root.after(50, _atender_cola, cola, total, carpeta_destino, resultado)
+
+def mostrar_resumen(total, exitosos, archivos_con_error, carpeta_destino, al_dia=0):
+    """Resumen final de procesar_carpeta"""
+    errores = len(archivos_con_error)
+    mensaje_final = f"Proceso completado:\n\n"
+    mensaje_final += f"✓ Exitosos: {exitosos}\n"
+    if al_dia:
+        mensaje_final += f"↷ Ya procesados (sin cambios): {al_dia}\n"
+    mensaje_final += f"✗ Errores: {errores}\n"
+    mensaje_final += f"Total: {total}\n\n"
+    mensaje_final += f"Archivos guardados en:\n{carpeta_destino}\n\n"
+
+    if archivos_con_error:
+        mensaje_final += f"Archivos con errores:\n"
+        for error_info in archivos_con_error[:5]:
+            mensaje_final += f"• {error_info}\n"
+        if len(archivos_con_error) > 5:
+            mensaje_final += f"... y {len(archivos_con_error) - 5} más.\n"
+        mensaje_final += f"\nRevisa el log para más detalles:\n{log_filename}"
+
+    logger.info(f"Proceso finalizado. Exitosos: {exitosos}, Errores: {errores}")
+
+    if errores > 0:
+        messagebox.showwarning("Proceso completado con errores", mensaje_final)
+    else:
+        messagebox.showinfo("Proceso completado", mensaje_final)
+
+# Sufijo que _unique_out_path agrega cuando el nombre ya existe en destino: _YYYYMMDD_HHMMSS
+RE_SUFIJO_SALIDA = re.compile(r"_\d{8}_\d{6}(?=\.[^.]*$)")
+
+def salidas_por_nombre(carpeta_destino):
+    """{nombre original: mtime de la salida más reciente} leyendo la carpeta destino una vez.
+    Una salida 'x_20240101_120000.xlsx' cuenta tanto para 'x.xlsx' como para su propio nombre."""
+    salidas = {}
+    try:
+        with os.scandir(carpeta_destino) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file():
+                    continue
+                mtime = entrada.stat().st_mtime
+                for nombre in {entrada.name, RE_SUFIJO_SALIDA.sub("", entrada.name)}:
+                    if mtime > salidas.get(nombre, float("-inf")):
+                        salidas[nombre] = mtime
+    except OSError as e:
+        logger.debug(f"No se pudo leer la carpeta destino {carpeta_destino}: {e}")
+    return salidas
+
+def salida_al_dia(ruta, salidas, mtime_origen=None):
+    """True si la salida más reciente de este archivo (ver salidas_por_nombre) es igual o más nueva que el original"""
+    try:
+        if mtime_origen is None:
+            mtime_origen = os.stat(ruta).st_mtime
+    except OSError:
+        return False
+    mtime_salida = salidas.get(os.path.basename(ruta))
+    return mtime_salida is not None and mtime_salida >= mtime_origen
+
+def procesar_carpeta(carpeta, use_xlwings_mode=False, use_zip_mode=False, reprocesar_todo=False):
     """Procesa carpeta completa con manejo robusto de errores"""
     try:
         logger.info(f"Iniciando procesamiento de carpeta: {carpeta}")
@@ -957,13 +1539,16 @@ def procesar_carpeta(carpeta, use_xlwings_mode=False):
         carpeta_destino = preguntar_carpeta_destino_var(CARPETA_LIMPIOS)
         
         archivos_validos = []
+        stat_origen = {}  # nombre -> stat del archivo, tomado del mismo recorrido del directorio
         try:
-            archivos_all = os.listdir(carpeta)
-            # Filtrar solo archivos excel y excluir temporales (~$)
-            archivos_validos = [
-                f for f in archivos_all
-                if f.lower().endswith((".xlsx", ".xlsm", ".xls")) and not is_temp_excel_file(f)
-            ]
+            # scandir: tipo (y en Windows también tamaño/fecha) vienen con la lectura del directorio
+            with os.scandir(carpeta) as entradas:
+                for entrada in entradas:
+                    # Filtrar solo archivos excel y excluir temporales (~$)
+                    if (entrada.name.lower().endswith((".xlsx", ".xlsm", ".xls"))
+                            and not is_temp_excel_file(entrada.name) and entrada.is_file()):
+                        stat_origen[entrada.name] = entrada.stat()
+            archivos_validos = list(stat_origen)
             logger.info(f"Archivos encontrados: {len(archivos_validos)}")
         except Exception as e:
             logger.error(f"Error listando archivos: {e}")
@@ -980,13 +1565,27 @@ def procesar_carpeta(carpeta, use_xlwings_mode=False):
             messagebox.showinfo("Límite aplicado", "Solo se procesarán los primeros 1000 archivos.")
             logger.warning("Límite de 1000 archivos aplicado")
 
+        # Archivos ya procesados en una corrida anterior: su salida más reciente (con o sin sufijo de fecha/hora)
+        # es igual o más nueva que el original. Una sola lectura de la carpeta destino.
+        al_dia = 0
+        if not reprocesar_todo:
+            salidas = salidas_por_nombre(carpeta_destino)
+            pendientes_ok = [
+                f for f in archivos_validos
+                if not salida_al_dia(os.path.join(carpeta, f), salidas, stat_origen[f].st_mtime)
+            ]
+            al_dia = len(archivos_validos) - len(pendientes_ok)
+            if al_dia:
+                logger.info(f"Omitidos {al_dia} archivo(s) ya procesados y sin cambios")
+        else:
+            pendientes_ok = archivos_validos
+
         # Verificar posibles sobrescrituras
         nombres_existentes = []
-        for archivo in archivos_validos:
-            nombre = Path(archivo).stem + Path(archivo).suffix
-            ruta_out = Path(carpeta_destino) / nombre
-            if ruta_out.exists():
-                nombres_existentes.append(nombre)
+        destino_str = os.fspath(carpeta_destino) + os.sep  # rutas armadas como texto: sin crear un Path por archivo
+        for archivo in pendientes_ok:
+            if os.path.exists(destino_str + archivo):
+                nombres_existentes.append(archivo)
 
         if nombres_existentes:
             lista = "\n".join(nombres_existentes[:5]) + ("\n..." if len(nombres_existentes) > 5 else "")
@@ -998,26 +1597,11 @@ def procesar_carpeta(carpeta, use_xlwings_mode=False):
                 logger.info("Usuario canceló el proceso")
                 return
 
-        total = len(archivos_validos)
-        exitosos = 0
-        errores = 0
-        archivos_con_error = []
-        
-        progreso["maximum"] = total
-        progreso["value"] = 0
-        root.update_idletasks()
-
-        logger.info(f"Iniciando procesamiento de {total} archivos...")
-
-        for i, archivo in enumerate(archivos_validos, start=1):
-            ruta = os.path.join(carpeta, archivo)
+        # Archivos muy grandes: se pregunta antes de repartir el trabajo (los diálogos solo en el hilo de Tk)
+        a_procesar = []
+        for archivo in pendientes_ok:
             try:
-                logger.info(f"[{i}/{total}] Procesando: {archivo}")
-                etiqueta_estado_var.set(f"Procesando [{i}/{total}]: {archivo}")
-                root.update_idletasks()
-                
-                # Verificar tamaño antes de procesar
-                size_mb = check_file_size(ruta)
+                size_mb = stat_origen[archivo].st_size / (1024 * 1024)
                 if size_mb > MAX_FILE_SIZE_MB * 2:  # Más del doble del límite recomendado
                     logger.warning(f"Archivo muy grande: {size_mb:.2f} MB")
                     respuesta = messagebox.askyesno(
@@ -1030,62 +1614,39 @@ def procesar_carpeta(carpeta, use_xlwings_mode=False):
                         logger.info(f"Usuario omitió archivo grande: {archivo}")
                         etiqueta_estado_var.set(f"Omitido: {archivo}")
                         continue
-                
-                ruta_proc = convertir_xls_a_xlsx_si_necesario(ruta)
-                out = process_workbook(ruta_proc, carpeta_destino, use_xlwings_mode=use_xlwings_mode)
-                
-                exitosos += 1
-                progreso["value"] = i
-                etiqueta_estado_var.set(f"✓ Completado [{i}/{total}]: {Path(out).name}")
-                logger.info(f"✓ Archivo procesado exitosamente: {out}")
-                
             except Exception as e:
-                errores += 1
-                archivos_con_error.append(f"{archivo}: {str(e)[:100]}")
-                logger.error(f"✗ Error procesando {archivo}: {e}")
-                logger.error(traceback.format_exc())
-                etiqueta_estado_var.set(f"✗ Error [{i}/{total}]: {archivo}")
-                
-            finally:
-                root.update_idletasks()
-                # Liberar memoria cada 10 archivos
-                if i % 10 == 0:
-                    gc.collect()
-
-        # Resumen final
-        mensaje_final = f"Proceso completado:\n\n"
-        mensaje_final += f"✓ Exitosos: {exitosos}\n"
-        mensaje_final += f"✗ Errores: {errores}\n"
-        mensaje_final += f"Total: {total}\n\n"
-        mensaje_final += f"Archivos guardados en:\n{carpeta_destino}\n\n"
-        
-        if archivos_con_error:
-            mensaje_final += f"Archivos con errores:\n"
-            for error_info in archivos_con_error[:5]:
-                mensaje_final += f"• {error_info}\n"
-            if len(archivos_con_error) > 5:
-                mensaje_final += f"... y {len(archivos_con_error) - 5} más.\n"
-            mensaje_final += f"\nRevisa el log para más detalles:\n{log_filename}"
-        
-        logger.info(f"Proceso finalizado. Exitosos: {exitosos}, Errores: {errores}")
-        
-        if errores > 0:
-            messagebox.showwarning("Proceso completado con errores", mensaje_final)
-        else:
-            messagebox.showinfo("Proceso completado", mensaje_final)
-            
+                logger.debug(f"Error verificando tamaño de {archivo}: {e}")
+            a_procesar.append(archivo)
+
+        total = len(archivos_validos)
+        progreso["maximum"] = total
+        progreso["value"] = 0
+        btn_select.state(['disabled'])  # una carpeta a la vez
+
+        # El trabajo va en un hilo aparte; la interfaz solo lee la cola cada 50 ms y nunca se queda congelada
+        cola = queue.Queue()
+        threading.Thread(
+            target=_trabajo_carpeta,
+            args=(carpeta, a_procesar, carpeta_destino, use_xlwings_mode, use_zip_mode, total, cola),
+            name="procesar_carpeta",
+            daemon=True,
+        ).start()
+        root.after(50, _atender_cola, cola, total, carpeta_destino, {"exitosos": 0, "errores": [], "al_dia": al_dia})
+
     except Exception as e:
         logger.error(f"Error crítico en procesar_carpeta: {e}")
         logger.error(traceback.format_exc())
+        btn_select.state(['!disabled'])
         messagebox.showerror("Error crítico", f"Error inesperado:\n{e}\n\nRevisa el log: {log_filename}")
 
-def seleccionar_carpeta(use_xlwings_mode=False):
+def seleccionar_carpeta(use_xlwings_mode=False, use_zip_mode=False, reprocesar_todo=False):
     """Selecciona carpeta con validación"""
     try:
         carpeta = filedialog.askdirectory(title="Selecciona carpeta con archivos Excel")
         if carpeta:
             logger.info(f"Carpeta seleccionada: {carpeta}")
-            procesar_carpeta(carpeta, use_xlwings_mode=use_xlwings_mode)
+            procesar_carpeta(carpeta, use_xlwings_mode=use_xlwings_mode, use_zip_mode=use_zip_mode,
+                             reprocesar_todo=reprocesar_todo)
         else:
             logger.info("Usuario canceló selección de carpeta")
     except Exception as e:
@@ -1146,11 +1707,14 @@ def mostrar_instrucciones():
             "3. Se te pedirá dónde guardar los archivos mejorados (raíz / subcarpeta / crear nueva).\n"
             "4. El programa procesará los archivos y guardará copias con fórmulas reemplazadas por valores.\n"
             "   - Si un archivo destino ya existe, se guardará con sufijo _YYYYMMDD_HHMMSS.\n"
+            "   - Si ya existe y es más reciente que el original, se omite (marca 'Reprocesar todos' para forzarlo).\n"
             "5. Modo xlwings (in-place): si activas la casilla y xlwings/Excel están disponibles,\n"
             "   se creará una copia y Excel reemplazará todas las fórmulas por valores.\n"
             "   Esto preserva macros, gráficos, imágenes y cualquier objeto exactamente como en el original.\n"
             "6. Se respetarán exactamente las filas/columnas inmovilizadas (freeze panes) del archivo original.\n"
             "7. Si xlwings no está disponible se usará el método openpyxl por defecto.\n"
+            "   Modo rápido: copia el archivo y deja cada fórmula con su último valor guardado, sin Excel;\n"
+            "   conserva gráficos y objetos pero no convierte textos a fechas/números.\n"
             "8. No interrumpas el proceso hasta que finalice.\n"
             "9. Revisa los logs en caso de errores.\n\n"
             f"📊 Log actual: {log_filename}\n"
@@ -1183,116 +1747,138 @@ def mostrar_info_sistema():
 # ---------------------------
 # Construir UI
 # ---------------------------
-try:
-    root = tk.Tk()
-    root.title("Limpiador de Excel por Lotes    By: Erick")
-    root.geometry("600x480")
-    root.resizable(False, False)
+# Los procesos del pool importan este módulo: la interfaz solo se construye en el proceso principal
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # ejecutable de PyInstaller: los procesos hijos no abren otra ventana
+    try:
+        init_logging()
+        root = tk.Tk()
+        root.title("Limpiador de Excel por Lotes    By: Erick")
+        root.geometry("600x540")
+        root.resizable(False, False)
 
-    frame = ttk.Frame(root, padding=18)
-    frame.pack(expand=True, fill='both')
+        frame = ttk.Frame(root, padding=18)
+        frame.pack(expand=True, fill='both')
 
-    # Título
-    ttk.Label(frame, text="Herramienta: Limpiar & Convertir Excel", font=("Segoe UI", 14, "bold")).pack(pady=8)
+        # Título
+        ttk.Label(frame, text="Herramienta: Limpiar & Convertir Excel", font=("Segoe UI", 14, "bold")).pack(pady=8)
     
-    # Separador
-    ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=5)
-
-    # Checkbox xlwings
-    use_xlwings_var = tk.BooleanVar(value=False)
-    chk_text = "✨ Procesar con Excel (xlwings) — copia + reemplazar fórmulas"
-    chk = ttk.Checkbutton(frame, text=chk_text, variable=use_xlwings_var)
-    chk.pack(pady=6, fill='x')
-
-    if not USE_XLWINGS:
-        chk.state(['disabled'])
-        lbl_xlw_hint = ttk.Label(
+        # Separador
+        ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=5)
+
+        # Checkbox xlwings
+        use_xlwings_var = tk.BooleanVar(value=False)
+        chk_text = "✨ Procesar con Excel (xlwings) — copia + reemplazar fórmulas"
+        chk = ttk.Checkbutton(frame, text=chk_text, variable=use_xlwings_var)
+        chk.pack(pady=6, fill='x')
+
+        if not USE_XLWINGS:
+            chk.state(['disabled'])
+            lbl_xlw_hint = ttk.Label(
+                frame, 
+                text="⚠️ xlwings no detectado. Instala: pip install xlwings",
+                foreground="orange"
+            )
+            lbl_xlw_hint.pack(pady=(0,6))
+
+        # Checkbox modo rápido (sin Excel ni openpyxl)
+        use_zip_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            frame,
+            text="⚡ Modo rápido — copia + quitar fórmulas (sin limpiar textos)",
+            variable=use_zip_var
+        ).pack(pady=(0,6), fill='x')
+
+        # Checkbox reprocesar: por defecto se omiten los archivos cuya salida ya está al día
+        reprocesar_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            frame,
+            text="🔁 Reprocesar todos (incluso los ya procesados sin cambios)",
+            variable=reprocesar_var
+        ).pack(pady=(0,6), fill='x')
+
+        # Separador
+        ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=8)
+
+        # Botón principal
+        btn_select = ttk.Button(
+            frame,
+            text="📂 Seleccionar Carpeta con Archivos",
+            command=lambda: seleccionar_carpeta(use_xlwings_mode=use_xlwings_var.get(),
+                                                use_zip_mode=use_zip_var.get(),
+                                                reprocesar_todo=reprocesar_var.get())
+        )
+        btn_select.pack(pady=8, fill='x', ipady=5)
+
+        # Barra de progreso
+        progreso = ttk.Progressbar(frame, length=400, mode='determinate')
+        progreso.pack(pady=10, fill='x')
+
+        # Estado
+        etiqueta_estado_var = tk.StringVar(value="⏳ Esperando acción...")
+        lbl_estado = ttk.Label(frame, textvariable=etiqueta_estado_var, font=("Segoe UI", 9))
+        lbl_estado.pack(pady=4)
+
+        # Separador
+        ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=10)
+
+        # Frame para botones adicionales
+        frame_botones = ttk.Frame(frame)
+        frame_botones.pack(fill='x', pady=5)
+
+        ttk.Button(
+            frame_botones, 
+            text="📁 Ver archivos limpios", 
+            command=abrir_carpeta_limpios
+        ).pack(side='left', expand=True, fill='x', padx=2)
+
+        ttk.Button(
+            frame_botones, 
+            text="📋 Ver logs", 
+            command=abrir_carpeta_logs
+        ).pack(side='left', expand=True, fill='x', padx=2)
+
+        # Frame para botones de ayuda
+        frame_ayuda = ttk.Frame(frame)
+        frame_ayuda.pack(fill='x', pady=5)
+
+        ttk.Button(
+            frame_ayuda, 
+            text="📘 Instrucciones", 
+            command=mostrar_instrucciones
+        ).pack(side='left', expand=True, fill='x', padx=2)
+
+        ttk.Button(
+            frame_ayuda, 
+            text="ℹ️ Info Sistema", 
+            command=mostrar_info_sistema
+        ).pack(side='left', expand=True, fill='x', padx=2)
+
+        # Separador
+        ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=8)
+
+        # Nota final
+        nota = ttk.Label(
             frame, 
-            text="⚠️ xlwings no detectado. Instala: pip install xlwings",
-            foreground="orange"
+            text="⚡ Todos los errores se registran en logs para diagnóstico",
+            font=("Segoe UI", 8),
+            foreground="gray"
         )
-        lbl_xlw_hint.pack(pady=(0,6))
-
-    # Separador
-    ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=8)
-
-    # Botón principal
-    btn_select = ttk.Button(
-        frame,
-        text="📂 Seleccionar Carpeta con Archivos",
-        command=lambda: seleccionar_carpeta(use_xlwings_mode=use_xlwings_var.get())
-    )
-    btn_select.pack(pady=8, fill='x', ipady=5)
-
-    # Barra de progreso
-    progreso = ttk.Progressbar(frame, length=400, mode='determinate')
-    progreso.pack(pady=10, fill='x')
-
-    # Estado
-    etiqueta_estado_var = tk.StringVar(value="⏳ Esperando acción...")
-    lbl_estado = ttk.Label(frame, textvariable=etiqueta_estado_var, font=("Segoe UI", 9))
-    lbl_estado.pack(pady=4)
-
-    # Separador
-    ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=10)
-
-    # Frame para botones adicionales
-    frame_botones = ttk.Frame(frame)
-    frame_botones.pack(fill='x', pady=5)
-
-    ttk.Button(
-        frame_botones, 
-        text="📁 Ver archivos limpios", 
-        command=abrir_carpeta_limpios
-    ).pack(side='left', expand=True, fill='x', padx=2)
-
-    ttk.Button(
-        frame_botones, 
-        text="📋 Ver logs", 
-        command=abrir_carpeta_logs
-    ).pack(side='left', expand=True, fill='x', padx=2)
-
-    # Frame para botones de ayuda
-    frame_ayuda = ttk.Frame(frame)
-    frame_ayuda.pack(fill='x', pady=5)
-
-    ttk.Button(
-        frame_ayuda, 
-        text="📘 Instrucciones", 
-        command=mostrar_instrucciones
-    ).pack(side='left', expand=True, fill='x', padx=2)
-
-    ttk.Button(
-        frame_ayuda, 
-        text="ℹ️ Info Sistema", 
-        command=mostrar_info_sistema
-    ).pack(side='left', expand=True, fill='x', padx=2)
-
-    # Separador
-    ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=8)
-
-    # Nota final
-    nota = ttk.Label(
-        frame, 
-        text="⚡ Todos los errores se registran en logs para diagnóstico",
-        font=("Segoe UI", 8),
-        foreground="gray"
-    )
-    nota.pack(pady=5)
-
-    logger.info("Interfaz gráfica iniciada correctamente")
-    logger.info(f"Log guardándose en: {log_filename}")
+        nota.pack(pady=5)
+
+        logger.info("Interfaz gráfica iniciada correctamente")
+        logger.info(f"Log guardándose en: {log_filename}")
     
-    root.mainloop()
+        root.mainloop()
     
-except Exception as e:
-    logger.critical(f"Error crítico al iniciar la aplicación: {e}")
-    logger.critical(traceback.format_exc())
-    try:
-        messagebox.showerror(
-            "Error Crítico", 
-            f"No se pudo iniciar la aplicación:\n\n{e}\n\nRevisa el log: {log_filename}"
-        )
-    except:
-        print(f"ERROR CRÍTICO: {e}")
-    sys.exit(1)
+    except Exception as e:
+        logger.critical(f"Error crítico al iniciar la aplicación: {e}")
+        logger.critical(traceback.format_exc())
+        try:
+            messagebox.showerror(
+                "Error Crítico", 
+                f"No se pudo iniciar la aplicación:\n\n{e}\n\nRevisa el log: {log_filename}"
+            )
+        except:
+            print(f"ERROR CRÍTICO: {e}")
+        sys.exit(1)